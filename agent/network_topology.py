@@ -166,6 +166,10 @@ class FractalNetwork:
         self.failure_handlers: List[Callable[[str, str], None]] = []
         
         self.graph = nx.DiGraph()
+        
+        # Bumped on every change that get_network_stats() can observe, so
+        # callers can reuse a stats snapshot while the version is unchanged
+        self.version: int = 0
     
     def add_node(
         self,
@@ -212,6 +216,7 @@ class FractalNetwork:
             self._create_connection(parent_id, node_id, ConnectionType.PARENT_CHILD)
             parent_node.children_ids.add(node_id)
         
+        self.version += 1
         return True
     
     def get_node(self, node_id: str) -> Optional[NetworkNode]:
@@ -245,6 +250,7 @@ class FractalNetwork:
         
         self.message_queue.append(message)
         self.active_messages[message_id] = message
+        self.version += 1
         
         return message_id
     
@@ -12,7 +12,7 @@ from dataclasses import dataclass
 from collections import defaultdict
 
 
-@dataclass
+@dataclass(slots=True)
 class LogEntry:
     """Structure for a single log entry."""
     timestamp: float
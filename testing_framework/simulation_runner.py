@@ -171,6 +171,8 @@ class SimulationRunner:
         self.current_generation = 0
         self.simulation_start_time = 0.0
         self.all_logs: List[Dict[str, Any]] = []
+        # (version, stats) from the last get_network_stats() call
+        self._network_stats_cache: Tuple[Optional[int], Dict[str, Any]] = (None, {})
         
         # Results storage
         self.results = {
@@ -194,13 +196,13 @@ class SimulationRunner:
                 "config": config
             })
     
-    def _emit_tick(self, agent_updates: List[Dict]):
+    def _emit_tick(self, agent_updates: List[Dict], timestamp: Optional[float] = None):
         """Emit tick with agent deltas to SimBridge."""
         if self.on_tick:
             self.on_tick({
                 "step": self.current_step,
                 "agent_updates": agent_updates,
-                "timestamp": time.time()
+                "timestamp": time.time() if timestamp is None else timestamp
             })
     
     def _emit_event(self, event_type: str, data: Dict):
@@ -213,13 +215,13 @@ class SimulationRunner:
                 "timestamp": time.time()
             })
     
-    def _emit_stats(self, stats: Dict):
+    def _emit_stats(self, stats: Dict, timestamp: Optional[float] = None):
         """Emit statistics to SimBridge."""
         if self.on_stats:
             self.on_stats({
                 "step": self.current_step,
                 "stats": stats,
-                "timestamp": time.time()
+                "timestamp": time.time() if timestamp is None else timestamp
             })
     
     def _emit_done(self, results: Dict):
@@ -321,6 +323,17 @@ class SimulationRunner:
         
         return nodes, edges
     
+    def _get_network_stats(self) -> Dict[str, Any]:
+        """Network statistics, recomputed only when the network's version changes."""
+        version = getattr(self.network, "version", None)
+        if version is None:
+            return self.network.get_network_stats()
+        cached_version, stats = self._network_stats_cache
+        if cached_version != version:
+            stats = self.network.get_network_stats()
+            self._network_stats_cache = (version, stats)
+        return stats
+    
     def _get_effective_config(self) -> Dict:
         """Get effective configuration for SimBridge."""
         return {
@@ -344,7 +357,7 @@ class SimulationRunner:
                 "step": step,
                 "total_agents": len(self.agents),
                 "total_memes": len(self.meme_pool.memes),
-                "network_stats": self.network.get_network_stats()
+                "network_stats": self._get_network_stats()
             }
             
             # Track agent updates for callbacks
@@ -359,15 +372,18 @@ class SimulationRunner:
                 try:
                     agent.update(1.0, environment_context)  # dt = 1.0
                     
-                    # Track changes for callback
-                    if (agent.energy_level != old_energy or 
-                        agent.health != old_health or 
-                        len(agent.active_memes) != old_memes):
+                    # Track changes for callback. Each update is a fresh dict:
+                    # SimBridge queues ticks for batched broadcast, so reusing
+                    # one dict per agent would overwrite ticks still queued.
+                    energy = agent.energy_level
+                    health = agent.health
+                    memes = len(agent.active_memes)
+                    if energy != old_energy or health != old_health or memes != old_memes:
                         agent_updates.append({
                             "id": agent.agent_id,
-                            "energy": agent.energy_level,
-                            "health": agent.health,
-                            "active_memes": len(agent.active_memes)
+                            "energy": energy,
+                            "health": health,
+                            "active_memes": memes
                         })
                         
                 except Exception as e:
@@ -381,13 +397,16 @@ class SimulationRunner:
             # Process meme propagation
             self._process_meme_propagation()
             
+            # One clock read stamps the tick, metrics and stats of this step
+            now = time.time()
+            
             # Emit tick with agent updates
             if agent_updates:
-                self._emit_tick(agent_updates)
+                self._emit_tick(agent_updates, now)
             
             # Collect metrics
             if step % 5 == 0:  # Collect every 5 steps
-                self.metrics_system.collect_all_metrics(time.time())
+                self.metrics_system.collect_all_metrics(now)
                 
                 # Emit stats
                 stats = {
@@ -396,7 +415,7 @@ class SimulationRunner:
                     "average_energy": sum(a.energy_level for a in self.agents) / len(self.agents),
                     "average_health": sum(a.health for a in self.agents) / len(self.agents)
                 }
-                self._emit_stats(stats)
+                self._emit_stats(stats, now)
             
             # Log progress
             if step % 10 == 0:
@@ -548,7 +567,7 @@ class SimulationRunner:
                 "step": step,
                 "total_agents": len(self.agents),
                 "total_memes": len(self.meme_pool.memes),
-                "network_stats": self.network.get_network_stats()
+                "network_stats": self._get_network_stats()
             }
             
             # Update all agents
@@ -8,7 +8,7 @@ import pytest
 import time
 
 from utilityfog_frontend.cli_viz import (
-    TreeRenderer, FlowRenderer, StateRenderer, InteractiveRenderer,
+    TreeRenderer, FlowRenderer, StateRenderer, InteractiveRenderer, RenderContext,
     HTMLExporter, SVGExporter, TextExporter, JSONExporter,
     VisualizationCLI, TreeNode, MessageFlow, StateTransition,
     VisualizationData, NodeState, MessageType
@@ -37,6 +37,16 @@ class TestModels:
         node.remove_child("child1")
         assert "child1" not in node.children
     
+    def test_models_use_slots(self):
+        """High-volume model objects carry no per-instance __dict__."""
+        for obj in (
+            TreeNode("n", "N"),
+            MessageFlow("m", "a", "b", MessageType.DATA, "x"),
+            StateTransition("n", NodeState.UNKNOWN, NodeState.ACTIVE),
+            VisualizationData(),
+        ):
+            assert not hasattr(obj, "__dict__")
+    
     def test_message_flow_creation(self):
         """Test MessageFlow creation and status updates."""
         message = MessageFlow("msg1", "node1", "node2", MessageType.DATA, "test content")
@@ -99,6 +109,189 @@ class TestModels:
         assert len(active_nodes) == 1
         assert active_nodes[0].id == "node1"
 
+    def test_active_and_root_indexes_track_mutations(self):
+        """Active/root lookups stay consistent across transitions and removals."""
+        data = VisualizationData()
+        parent = TreeNode("p", "Parent", NodeState.ACTIVE, children=["c"])
+        child = TreeNode("c", "Child", NodeState.INACTIVE, parent_id="p")
+        data.add_node(parent)
+        data.add_node(child)
+
+        data.add_transition(StateTransition("c", NodeState.INACTIVE, NodeState.ACTIVE))
+        assert {n.id for n in data.get_active_nodes()} == {"p", "c"}
+
+        parent.update_state(NodeState.ERROR)
+        assert [n.id for n in data.get_active_nodes()] == ["c"]
+
+        data.remove_node("p")
+        assert [n.id for n in data.get_active_nodes()] == ["c"]
+        assert [n.id for n in data.get_root_nodes()] == ["c"]
+
+        # Nodes passed at construction time are indexed too.
+        seeded = VisualizationData(nodes={"x": TreeNode("x", "X", NodeState.ACTIVE)})
+        assert [n.id for n in seeded.get_active_nodes()] == ["x"]
+        assert [n.id for n in seeded.get_root_nodes()] == ["x"]
+
+    def test_indexes_follow_node_order(self):
+        """Root and active lookups list nodes in ``nodes`` order, not index order."""
+        data = VisualizationData()
+        data.add_node(TreeNode("a", "A", children=["b"]))
+        data.add_node(TreeNode("b", "B", parent_id="a"))
+        data.add_node(TreeNode("c", "C"))
+
+        data.remove_node("a")
+        assert [n.id for n in data.get_root_nodes()] == ["b", "c"]
+
+        data.nodes["c"].update_state(NodeState.ACTIVE)
+        data.nodes["b"].update_state(NodeState.ACTIVE)
+        assert [n.id for n in data.get_active_nodes()] == ["b", "c"]
+
+    def test_direct_field_assignment_updates_indexes(self):
+        """Assigning ``state``/``parent_id`` directly is reflected in lookups."""
+        data = VisualizationData()
+        data.add_node(TreeNode("a", "A"))
+        data.add_node(TreeNode("b", "B"))
+
+        data.nodes["a"].state = NodeState.ACTIVE
+        assert [n.id for n in data.get_active_nodes()] == ["a"]
+
+        data.nodes["b"].parent_id = "a"
+        assert [n.id for n in data.get_root_nodes()] == ["a"]
+        assert data.get_node_hierarchy() == {"a": ["b"]}
+
+        data.nodes["b"].parent_id = None
+        assert [n.id for n in data.get_root_nodes()] == ["a", "b"]
+
+    def test_registration_is_invisible_to_dataclass_helpers(self):
+        """Registered nodes still convert, compare and print like plain ones."""
+        from dataclasses import asdict
+
+        data = VisualizationData()
+        node = TreeNode("a", "A", last_updated=1.0)
+        data.add_node(node)
+
+        assert asdict(node)["name"] == "A"
+        assert asdict(data)["nodes"]["a"]["id"] == "a"
+        assert node == TreeNode("a", "A", last_updated=1.0)
+        assert TreeNode("a", "A", last_updated=1.0) == node
+        assert repr(node).startswith("TreeNode(")
+
+    def test_equality_ignores_internal_caches(self):
+        """Datasets with the same content compare equal whatever was queried."""
+        def build():
+            data = VisualizationData()
+            data.add_node(TreeNode("a", "A", NodeState.ACTIVE, last_updated=1.0))
+            data.add_message(MessageFlow("m", "a", "a", MessageType.DATA, "x", timestamp=1.0))
+            return data
+
+        queried, fresh = build(), build()
+        queried.get_active_nodes()
+        queried.get_root_nodes()
+        queried.get_node_hierarchy()
+        queried.touch_node("a")
+        assert queried == fresh
+
+    def test_subtree_versions_cover_ancestors_of_changed_nodes(self):
+        """A change deep in the tree is reflected in every ancestor's version."""
+        data = VisualizationData()
+        data.add_node(TreeNode("n0", "N0"))
+        for i in range(1, 50):
+            data.add_node(TreeNode(f"n{i}", f"N{i}", parent_id=f"n{i - 1}"))
+        data.add_node(TreeNode("other", "Other"))
+        before = {node_id: data.get_subtree_version(node_id) for node_id in data.nodes}
+
+        data.nodes["n49"].update_state(NodeState.ACTIVE)
+        data.nodes["n30"].name = "Renamed"
+
+        changed = {node_id for node_id in data.nodes
+                   if data.get_subtree_version(node_id) != before[node_id]}
+        assert changed == {f"n{i}" for i in range(50)}
+
+    def test_node_hierarchy_cache_invalidated_on_structural_change(self):
+        """Hierarchy is reused between frames and rebuilt after add/remove."""
+        data = VisualizationData()
+        data.add_node(TreeNode("root", "Root", children=["a", "b"]))
+        data.add_node(TreeNode("a", "A", parent_id="root"))
+
+        first = data.get_node_hierarchy()
+        assert data.get_node_hierarchy() is first
+        assert first == {"root": ["a"]}
+
+        data.add_node(TreeNode("b", "B", parent_id="root"))
+        assert data.get_node_hierarchy() == {"root": ["a", "b"]}
+
+        data.remove_node("root")
+        assert data.get_node_hierarchy() == {}
+        assert {n.id for n in data.get_root_nodes()} == {"a", "b"}
+
+    def test_recent_messages_by_type_follows_retention_window(self):
+        """Per-type buckets mirror the 100-message window, including eviction."""
+        data = VisualizationData()
+        data.add_message(MessageFlow("first", "a", "b", MessageType.HEARTBEAT, "hb"))
+        for i in range(100):
+            data.add_message(MessageFlow(f"m{i}", "a", "b", MessageType.DATA, i))
+
+        by_type = data.get_recent_messages_by_type(3600.0)
+        assert list(by_type) == [MessageType.DATA]
+        assert len(by_type[MessageType.DATA]) == 100
+        assert len(data.messages) == 100
+
+    def test_recent_windows_accept_frame_timestamp(self):
+        """Callers can pin one ``now`` per frame instead of re-reading the clock."""
+        data = VisualizationData()
+        data.add_message(MessageFlow("old", "a", "b", MessageType.DATA, "x", timestamp=100.0))
+        data.add_message(MessageFlow("new", "a", "b", MessageType.DATA, "y", timestamp=150.0))
+        data.add_transition(StateTransition("n", NodeState.UNKNOWN, NodeState.ACTIVE, timestamp=150.0))
+
+        assert [m.id for m in data.get_recent_messages(60.0, now=200.0)] == ["new"]
+        assert len(data.get_recent_messages_by_type(120.0, now=200.0)[MessageType.DATA]) == 2
+        assert len(data.get_recent_transitions(10.0, now=200.0)) == 0
+        assert data.transitions[0].duration_since(now=200.0) == 50.0
+
+    def test_message_and_transition_logs_stay_in_sync_with_indexes(self):
+        """The logs are tuples; a reassigned log is re-indexed before use."""
+        data = VisualizationData(
+            messages=[MessageFlow("a", "x", "y", MessageType.DATA, 1, timestamp=100.0)]
+        )
+        with pytest.raises(AttributeError):
+            data.messages.append(MessageFlow("b", "x", "y", MessageType.DATA, 2))
+
+        data.messages = [
+            MessageFlow("late", "x", "y", MessageType.ERROR, 3, timestamp=190.0),
+            MessageFlow("early", "x", "y", MessageType.DATA, 4, timestamp=120.0),
+        ]
+        data.transitions = [
+            StateTransition("n", NodeState.UNKNOWN, NodeState.ACTIVE, timestamp=195.0)
+        ]
+        assert [m.id for m in data.get_recent_messages(30.0, now=200.0)] == ["late"]
+        assert list(data.get_recent_messages_by_type(100.0, now=200.0)) == [
+            MessageType.DATA, MessageType.ERROR,
+        ]
+        assert len(data.get_recent_transitions(10.0, now=200.0)) == 1
+
+        data.add_message(MessageFlow("next", "x", "y", MessageType.DATA, 5, timestamp=199.0))
+        assert [m.id for m in data.messages] == ["late", "early", "next"]
+        assert [m.id for m in data.get_recent_messages(30.0, now=200.0)] == ["late", "next"]
+
+    def test_recent_windows_handle_out_of_order_timestamps(self):
+        """Time-window queries are correct whether or not input is time-ordered."""
+        now = time.time()
+        data = VisualizationData()
+        for i, age in enumerate([500, 10, 400, 5]):
+            data.add_message(MessageFlow(f"m{i}", "a", "b", MessageType.DATA, i, timestamp=now - age))
+            data.add_transition(StateTransition(f"n{i}", NodeState.UNKNOWN, NodeState.ACTIVE,
+                                                timestamp=now - age))
+
+        assert [m.id for m in data.get_recent_messages(60.0)] == ["m1", "m3"]
+        assert [t.node_id for t in data.get_recent_transitions(60.0)] == ["n1", "n3"]
+        assert [m.id for m in data.get_recent_messages_by_type(60.0)[MessageType.DATA]] == ["m1", "m3"]
+
+        ordered = VisualizationData()
+        for i, age in enumerate([500, 400, 10, 5]):
+            ordered.add_message(MessageFlow(f"m{i}", "a", "b", MessageType.DATA, i, timestamp=now - age))
+        assert [m.id for m in ordered.get_recent_messages(60.0)] == ["m2", "m3"]
+        assert [m.id for m in ordered.get_recent_messages_by_type(60.0)[MessageType.DATA]] == ["m2", "m3"]
+
 
 class TestRenderers:
     """Test rendering engines."""
@@ -146,6 +339,72 @@ class TestRenderers:
         assert "Total Nodes: 3" in output
         assert "Active Nodes: 1" in output
     
+    def test_tree_renderer_refreshes_cached_subtrees(self, sample_data):
+        """Memoized subtrees are re-rendered after state or metadata changes."""
+        renderer = TreeRenderer(width=80, height=24)
+        assert "◐ Child 1" in renderer.render(sample_data)
+
+        sample_data.nodes["child1"].update_state(NodeState.ERROR)
+        assert "✗ Child 1" in renderer.render(sample_data)
+
+        sample_data.nodes["child2"].metadata["load"] = 3
+        sample_data.touch_node("child2")
+        assert "[load=3]" in renderer.render(sample_data)
+
+    def test_tree_renderer_refreshes_after_direct_assignment(self, sample_data):
+        """Assigning a node's name or metadata invalidates its cached rows."""
+        renderer = TreeRenderer()
+        renderer.render(sample_data)
+
+        sample_data.nodes["child1"].name = "Renamed"
+        assert "◐ Renamed" in renderer.render(sample_data)
+
+        sample_data.nodes["child2"].metadata = {"x": 1}
+        assert "[x=1]" in renderer.render(sample_data)
+
+    def test_tree_renderer_refreshes_after_option_change(self, sample_data):
+        """Toggling ``show_ids`` or ``use_color`` re-renders cached subtrees."""
+        renderer = TreeRenderer()
+        assert "root: Root Node" not in renderer.render(sample_data)
+
+        renderer.show_ids = True
+        assert "root: Root Node" in renderer.render(sample_data)
+
+        renderer.use_color = True
+        assert "\x1b[" in renderer.render(sample_data)
+
+    def test_tree_renderer_drops_removed_subtrees(self, sample_data):
+        """A node re-added under a removed node's id renders fresh, not cached."""
+        sample_data.add_node(TreeNode("leaf", "Leaf", parent_id="child1"))
+        sample_data.add_node(TreeNode("leaf2", "Leaf 2", parent_id="child1"))
+        sample_data.nodes["child1"].add_child("leaf")
+        sample_data.nodes["child1"].add_child("leaf2")
+        renderer = TreeRenderer()
+        assert "Child 1" in renderer.render(sample_data)
+
+        sample_data.remove_node("child1")
+        assert "Child 1" not in renderer.render(sample_data)
+
+        sample_data.add_node(TreeNode("child1", "Replacement", parent_id="root"))
+        sample_data.nodes["root"].add_child("child1")
+        output = renderer.render(sample_data)
+        assert "Replacement" in output
+        assert "Child 1" not in output
+
+    def test_tree_renderer_handles_trees_deeper_than_recursion_limit(self):
+        """Rendering is iterative, so very deep chains don't raise RecursionError."""
+        import sys
+
+        depth = sys.getrecursionlimit() + 200
+        data = VisualizationData()
+        data.add_node(TreeNode("n0", "N0"))
+        for i in range(1, depth):
+            data.add_node(TreeNode(f"n{i}", f"N{i}", parent_id=f"n{i - 1}"))
+
+        output = TreeRenderer().render(data)
+        assert f"N{depth - 1}" in output
+        assert f"Total Nodes: {depth}" in output
+    
     def test_flow_renderer(self, sample_data):
         """Test message flow rendering."""
         renderer = FlowRenderer(width=80, height=24, time_window=3600.0)
@@ -182,6 +441,31 @@ class TestRenderers:
         
         assert renderer.switch_view("invalid") == False
         assert renderer.current_view == "flow"  # Should remain unchanged
+    
+    def test_render_context_shared_across_views(self, sample_data):
+        """Renderers given one context reuse its frame time and window queries."""
+        ctx = RenderContext(sample_data)
+        assert not hasattr(ctx, "__dict__")
+        assert ctx.get_recent_messages(60.0) is ctx.get_recent_messages(60.0)
+
+        tree_output = TreeRenderer().render(sample_data, ctx)
+        flow_output = FlowRenderer(time_window=3600.0).render(sample_data, ctx)
+        state_output = StateRenderer(time_window=3600.0).render(sample_data, ctx)
+
+        assert "Recent Messages: 2" in tree_output
+        assert "Root Node → Child 1" in flow_output
+        assert "inactive → processing" in state_output
+
+    def test_state_symbols_colored_only_when_enabled(self, sample_data):
+        """Color codes are opt-in and follow the selected color scheme."""
+        plain = TreeRenderer().render(sample_data)
+        assert "\x1b[" not in plain
+
+        colored = TreeRenderer(color_scheme="dark", use_color=True).render(sample_data)
+        assert "\x1b[38;2;0;255;0m●\x1b[0m Root Node" in colored
+
+        state_output = StateRenderer(time_window=3600.0, use_color=True).render(sample_data)
+        assert "\x1b[90m○\x1b[0m inactive" in state_output
 
 
 class TestExporters:
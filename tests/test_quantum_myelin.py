@@ -0,0 +1,53 @@
+"""Pin the myelin kernel to the scalar pair-by-pair exchange."""
+import random
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+from utilityfog_frontend.quantum_myelin import myelin_layer, myelin_layer_sequential
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+
+def _pairwise(states, strength, adjacency=None):
+    agents = [SimpleNamespace(state=float(s)) for s in states]
+    for i in range(len(agents)):
+        for j in range(i + 1, len(agents)):
+            if adjacency is None or adjacency[i][j]:
+                myelin_layer(agents[i], agents[j], entanglement_strength=strength)
+    return [agent.state for agent in agents]
+
+
+def test_sequential_matches_pairwise_loop():
+    assert myelin_layer_sequential([0.0, 1.0, 2.0, 3.0], 0.5) == [
+        2.125, 1.5, 1.1875, 1.1875,
+    ]
+
+    rng = random.Random(7)
+    states = [rng.random() for _ in range(12)]
+    adjacency = [[rng.random() < 0.4 for _ in range(12)] for _ in range(12)]
+    assert myelin_layer_sequential(states, 0.3, adjacency) == _pairwise(
+        states, 0.3, adjacency
+    )
+
+
+def test_scalar_import_does_not_load_numpy():
+    code = (
+        "import sys, utilityfog_frontend.quantum_myelin; "
+        "print('numpy' in sys.modules)"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=str(PROJECT_ROOT), capture_output=True, text=True, timeout=60,
+    )
+    assert proc.stdout.strip() == "False", proc.stderr
+
+
+def test_evolve_agents_keeps_pairwise_semantics(monkeypatch):
+    monkeypatch.syspath_prepend(str(PROJECT_ROOT / "utilityfog_frontend"))
+    from sample_integration import evolve_agents
+
+    agents = [SimpleNamespace(state=s) for s in (0.0, 1.0, 2.0, 3.0)]
+    evolve_agents(agents)
+    assert [agent.state for agent in agents] == [2.125, 1.5, 1.1875, 1.1875]
@@ -0,0 +1,125 @@
+"""Batched broadcasts from SimBridge callbacks to the WebSocket server.
+
+Skips when fastapi is absent (sim_bridge imports ws_server, which needs
+fastapi).
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from utilityfog_frontend.backend import ws_server
+from utilityfog_frontend.backend.sim_bridge import SimBridge
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Record every broadcast as (type, payload) in the order clients get it."""
+    frames = []
+
+    def recorder(message_type, delay=0.0):
+        async def broadcast(run_id, data):
+            await asyncio.sleep(delay)
+            frames.append((message_type, data))
+        return broadcast
+
+    monkeypatch.setattr(ws_server, "broadcast_init_state", recorder("init_state"))
+    monkeypatch.setattr(ws_server, "broadcast_batch", recorder("batch", delay=0.001))
+    monkeypatch.setattr(ws_server, "broadcast_done", recorder("done"))
+    monkeypatch.setattr(ws_server, "broadcast_error", recorder("error"))
+    return frames
+
+
+def _tick(step):
+    return {"step": step, "agent_updates": [{"id": "a"}]}
+
+
+def _types(batch):
+    return [entry["type"] for entry in batch]
+
+
+def test_ticks_events_and_stats_share_one_batch_frame(sent):
+    bridge = SimBridge(tick_batch_size=2, tick_batch_ms=60_000)
+    bridge._on_tick("run", _tick(1))
+    bridge._on_event("run", {"event_type": "E"})
+    bridge._on_stats("run", {"stats": {}})
+    assert sent == []
+
+    bridge._on_tick("run", _tick(2))
+    assert [t for t, _ in sent] == ["batch"]
+    assert _types(sent[0][1]) == ["tick", "event", "stats", "tick"]
+
+
+@pytest.mark.parametrize("callback, frame", [("_on_done", "done"), ("_on_error", "error")])
+def test_terminal_message_flushes_queued_batch_first(sent, callback, frame):
+    bridge = SimBridge(tick_batch_size=10, tick_batch_ms=60_000)
+    bridge._on_tick("run", _tick(1))
+    getattr(bridge, callback)("run", {"error": "boom"})
+
+    assert [t for t, _ in sent] == ["batch", frame]
+    assert _types(sent[0][1]) == ["tick"]
+
+
+def test_timer_flushes_batch_without_further_messages(sent):
+    async def scenario():
+        bridge = SimBridge(tick_batch_size=10, tick_batch_ms=20)
+        bridge._loop = asyncio.get_running_loop()
+        worker = threading.Thread(target=bridge._on_tick, args=("run", _tick(1)))
+        worker.start()
+        worker.join()
+        deadline = time.monotonic() + 5
+        while not sent and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        bridge._wait_for_broadcast()
+
+    asyncio.run(scenario())
+    assert [t for t, _ in sent] == ["batch"]
+
+
+def test_broadcasts_from_simulation_thread_keep_their_order(sent):
+    async def scenario():
+        bridge = SimBridge(tick_batch_size=3, tick_batch_ms=60_000)
+        bridge._loop = asyncio.get_running_loop()
+
+        def simulate():
+            bridge._on_init("run", {"nodes": []})
+            for step in range(7):
+                bridge._on_event("run", {"event_type": "E", "step": step})
+                bridge._on_tick("run", _tick(step))
+            bridge._on_done("run", {})
+            bridge._wait_for_broadcast()
+
+        worker = threading.Thread(target=simulate)
+        worker.start()
+        while worker.is_alive():
+            await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert [t for t, _ in sent] == ["init_state", "batch", "batch", "batch", "done"]
+    steps = [entry["data"]["step"] for _, batch in sent[1:4] for entry in batch]
+    assert steps == sorted(steps)
+    assert sum(_types(batch).count("tick") for _, batch in sent[1:4]) == 7
+
+
+def test_stop_forgets_init_state(sent, monkeypatch):
+    manager = ws_server.ConnectionManager()
+    manager.init_state_text["run"] = '{"type": "init_state"}'
+    monkeypatch.setattr(ws_server, "connection_manager", manager)
+
+    bridge = SimBridge()
+    release = threading.Event()
+    bridge.simulation_thread = threading.Thread(target=release.wait)
+    bridge.simulation_thread.start()
+    bridge.current_run_id = "run"
+    bridge.status = "running"
+    try:
+        asyncio.run(bridge.stop_simulation())
+    finally:
+        release.set()
+        bridge.simulation_thread.join()
+
+    assert [t for t, _ in sent] == ["done"]
+    assert manager.init_state_text == {}
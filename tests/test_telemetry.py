@@ -3,6 +3,10 @@ Comprehensive tests for telemetry system.
 """
 
 import asyncio
+import copy
+import pickle
+from dataclasses import asdict
+
 import pytest
 
 from utilityfog_frontend.telemetry import (
@@ -45,6 +49,54 @@ class TestMetrics:
         with pytest.raises(ValueError):
             counter.increment(-1.0)
 
+    def test_counter_concurrent_increments(self):
+        """Concurrent increments are never lost."""
+        import threading
+
+        counter = Counter("test_counter")
+
+        def worker():
+            for _ in range(10000):
+                counter.increment()
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert counter.get_value().value == 40000.0
+
+    def test_value_records_use_slots(self):
+        """Per-event/per-export records carry no instance __dict__."""
+        from utilityfog_frontend.telemetry.collector import TelemetryEvent
+        from utilityfog_frontend.telemetry.exporter import ExportedMetric
+        from utilityfog_frontend.telemetry.metrics import MetricValue
+
+        for record in (
+            MetricValue(value=1.0),
+            TelemetryEvent(name="event", value=1),
+            ExportedMetric("m", "counter", "", [], 0.0),
+        ):
+            assert not hasattr(record, "__dict__")
+
+    def test_counter_increment_waits_for_reset(self):
+        """increment() takes the same lock as reset(), so a reset is never undone."""
+        import threading
+
+        counter = Counter("test_counter")
+        counter.increment(5.0)
+        worker = threading.Thread(target=counter.increment)
+
+        with counter._lock:  # a reset in progress
+            worker.start()
+            worker.join(timeout=0.2)
+            assert worker.is_alive()
+            counter._value = 0.0
+        worker.join(timeout=5)
+
+        assert counter.get_value().value == 1.0
+
     def test_gauge_operations(self):
         """Test gauge set, increment, and decrement operations."""
         gauge = Gauge("test_gauge", "Test gauge")
@@ -88,6 +140,52 @@ class TestMetrics:
         sum_value = next(v for v in values if v.labels.get("type") == "sum")
         assert sum_value.value == 2.35  # 0.05 + 0.3 + 2.0
 
+    def test_metric_labels_are_shared_read_only(self):
+        """get_value hands out one read-only labels view instead of copies."""
+        counter = Counter("test_counter", labels={"node": "a"})
+
+        first, second = counter.get_value(), counter.get_value()
+        assert first.labels is second.labels
+        assert first.labels == {"node": "a"}
+        with pytest.raises(TypeError):
+            first.labels["node"] = "b"
+
+    def test_metric_values_copy_and_pickle(self):
+        """Shared labels survive asdict, deepcopy and a pickle round trip."""
+        histogram = Histogram("test_histogram", buckets=[1.0], labels={"node": "a"})
+        histogram.observe(0.5)
+
+        for value in histogram.get_value():
+            assert asdict(value)["labels"] == value.labels
+            assert copy.deepcopy(value) == value
+            restored = pickle.loads(pickle.dumps(value))
+            assert restored == value
+            with pytest.raises(TypeError):
+                restored.labels["node"] = "b"
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Bucket values count every observation at or below their bound."""
+        histogram = Histogram("test_histogram", buckets=[1.0, 0.1, 0.5])
+
+        for value in (0.05, 0.1, 0.3, 0.7, 9.0):
+            histogram.observe(value)
+
+        buckets = [(v.labels["le"], v.value) for v in histogram.get_value() if "le" in v.labels]
+        assert buckets == [("0.1", 2), ("0.5", 3), ("1.0", 4)]
+
+        histogram.reset()
+        assert all(v.value == 0 for v in histogram.get_value())
+
+    def test_histogram_nan_is_counted_in_no_bucket(self):
+        """NaN adds to the count but, as with plain comparisons, to no bucket."""
+        histogram = Histogram("test_histogram", buckets=[0.1, 1.0])
+        histogram.observe(float("nan"))
+        histogram.observe(0.5)
+
+        values = histogram.get_value()
+        assert [v.value for v in values if "le" in v.labels] == [0, 1]
+        assert next(v for v in values if v.labels.get("type") == "count").value == 2
+
 
 class TestTelemetryCollector:
     """Test telemetry collector functionality."""
@@ -135,6 +233,50 @@ class TestTelemetryCollector:
         assert number_event.value == 42
         assert number_event.labels["type"] == "number"
 
+        # Events without labels/metadata share one read-only empty mapping
+        assert test_event.labels == {} and test_event.metadata == {}
+        with pytest.raises(TypeError):
+            test_event.labels["key"] = "value"
+
+    def test_events_copy_and_pickle(self, collector):
+        """Events sharing the empty labels survive deepcopy and pickle."""
+        collector.record_event("test_event", 1)
+        event = collector.get_events()[-1]
+
+        assert asdict(event)["metadata"] == {}
+        assert copy.deepcopy(event) == event
+        assert pickle.loads(pickle.dumps(event)) == event
+
+    def test_event_buffer_keeps_most_recent(self, collector):
+        """Only the last 1000 events are retained, in recording order."""
+        for i in range(1005):
+            collector.record_event("tick", i)
+
+        events = collector.get_events()
+        assert len(events) == 1000
+        assert events[0].value == 5
+        assert [e.value for e in collector.get_events(limit=3)] == [1002, 1003, 1004]
+
+    def test_concurrent_event_recording(self, collector):
+        """Producers record without the collector lock while readers copy."""
+        import threading
+
+        def producer():
+            for i in range(2000):
+                collector.record_event("tick", i)
+
+        threads = [threading.Thread(target=producer) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            assert len(collector.get_events(limit=10)) <= 10
+        for thread in threads:
+            thread.join()
+
+        assert len(collector.get_events()) == 1000
+        total = collector.get_metric("telemetry_events_total").get_value()
+        assert total.value == 8000
+
     def test_hooks(self, collector):
         """Test hook registration and triggering."""
         hook_calls = []
@@ -151,6 +293,22 @@ class TestTelemetryCollector:
         # Hook should have been called
         assert len(hook_calls) > 0
 
+    def test_hook_removed_during_dispatch(self, collector):
+        """Hooks can unregister while the same event is being dispatched."""
+        calls = []
+
+        def once(data):
+            calls.append("once")
+            collector.remove_hook("test", once)
+
+        collector.add_hook("test", once)
+        collector.add_hook("test", lambda data: calls.append("always"))
+
+        collector.record_event("test", 1)
+        collector.record_event("test", 2)
+
+        assert calls == ["once", "always", "always"]
+
     @pytest.mark.asyncio
     async def test_collection_lifecycle(self, collector):
         """Test starting and stopping collection."""
@@ -186,6 +344,14 @@ class TestTelemetryCollector:
         assert "test_counter" in snapshot["metrics"]
         assert snapshot["metrics"]["test_counter"]["value"] == 5.0
 
+        # Every value in one snapshot shares the snapshot's timestamp
+        assert snapshot["metrics"]["test_counter"]["timestamp"] == snapshot["timestamp"]
+
+        # Snapshots hold plain dicts so they stay JSON-serializable
+        import json
+
+        json.dumps(snapshot)
+
 
 class TestSystemHooks:
     """Test system integration hooks."""
@@ -274,8 +440,9 @@ class TestExporters:
         success = await exporter.export_metrics(collector_with_metrics)
         assert success
 
-        # Check that file was created
+        # Check that file was created and the temp file was moved into place
         assert output_file.exists()
+        assert [p.name for p in tmp_path.iterdir()] == ["metrics.json"]
 
         # Parse and validate JSON content
         import json
@@ -290,6 +457,24 @@ class TestExporters:
         assert data["metrics"]["test_counter"]["value"] == 10.0
         assert data["metrics"]["test_gauge"]["value"] == 42.5
 
+    @pytest.mark.asyncio
+    async def test_multi_exporter_isolates_failures(self, collector_with_metrics, tmp_path):
+        """One failing exporter doesn't stop the others."""
+        from utilityfog_frontend.telemetry.exporter import MultiExporter
+
+        class BrokenExporter(JSONExporter):
+            async def export_metrics(self, collector):
+                raise RuntimeError("boom")
+
+        output_file = tmp_path / "metrics.prom"
+        exporter = MultiExporter([BrokenExporter(), PrometheusAdapter(str(output_file))])
+
+        assert await exporter.export_metrics(collector_with_metrics)
+        assert "test_counter 10.0" in output_file.read_text(encoding="utf-8")
+        assert not await MultiExporter([BrokenExporter()]).export_metrics(
+            collector_with_metrics
+        )
+
 
 class TestIntegration:
     """Integration tests for complete telemetry system."""
@@ -399,3 +584,162 @@ class TestPrometheusHistogramExposition:
 
         content = output_file.read_text(encoding="utf-8")
         assert 'path="a\\"b\\\\c"' in content
+
+    def test_label_strings_stay_correct_across_exports(self):
+        collector = TelemetryCollector()
+        hist = collector.register_histogram(
+            "req_seconds", "Request duration", buckets=[0.1, 1.0], labels={"svc": "api"}
+        )
+        # Same label set as the histogram's unlabelled count sample
+        counter = collector.register_counter("typed_total", labels={"type": "count"})
+        plain = collector.register_histogram("plain_seconds", buckets=[1.0])
+        hist.observe(0.5)
+        counter.increment()
+        plain.observe(0.5)
+
+        adapter = PrometheusAdapter()
+
+        def render():
+            metrics = collector.get_all_metrics()
+            return adapter._generate_prometheus_text(
+                [adapter.format_metric(name, m) for name, m in metrics.items()]
+            )
+
+        first = render()
+        hist.observe(5.0)
+        second = render()
+
+        assert 'req_seconds_bucket{svc="api",le="1.0"} 1' in first
+        assert 'req_seconds_bucket{svc="api",le="1.0"} 1' in second
+        assert 'req_seconds_bucket{svc="api",le="+Inf"} 2' in second
+        assert 'typed_total{type="count"} 1.0' in second
+        assert "plain_seconds_count 1" in second
+
+    def test_metric_subclasses_use_base_format(self):
+        class RequestCounter(Counter):
+            pass
+
+        adapter = PrometheusAdapter()
+        exported = adapter.format_metric("requests_total", RequestCounter("requests_total"))
+
+        assert exported.metric_type == "counter"
+        assert exported.values[0]["value"] == 0.0
+
+
+class TestExportOutput:
+    """Export files are written without blocking or clobbering readers."""
+
+    @pytest.mark.skipif(not hasattr(__import__("os"), "mkfifo"), reason="needs FIFOs")
+    def test_export_streams_into_named_pipe(self, tmp_path):
+        # A sidecar reading from a FIFO must keep its pipe: the temp-file
+        # rename used for regular files would replace it with a plain file.
+        import os
+        import stat
+        import threading
+
+        from utilityfog_frontend.telemetry.exporter import _write_export
+
+        fifo = tmp_path / "metrics.prom"
+        os.mkfifo(fifo)
+        received = []
+        reader = threading.Thread(target=lambda: received.append(fifo.read_bytes()))
+        reader.start()
+
+        payload = b"x_total 1.0\n" * 20000
+        _write_export(str(fifo), payload)
+        reader.join(timeout=5)
+
+        assert received == [payload]
+        assert stat.S_ISFIFO(os.stat(fifo).st_mode)
+
+    def test_export_keeps_file_mode(self, tmp_path):
+        import os
+        import stat
+
+        from utilityfog_frontend.telemetry.exporter import _write_export
+
+        target = tmp_path / "metrics.prom"
+        target.write_bytes(b"old\n")
+        os.chmod(target, 0o640)
+
+        _write_export(str(target), b"new\n")
+
+        assert target.read_bytes() == b"new\n"
+        assert stat.S_IMODE(os.stat(target).st_mode) == 0o640
+        assert [p.name for p in tmp_path.iterdir()] == ["metrics.prom"]
+
+    @pytest.mark.skipif(not hasattr(__import__("socket"), "AF_UNIX"), reason="needs AF_UNIX")
+    def test_export_is_sent_to_unix_socket(self, tmp_path):
+        import socket
+        import threading
+
+        from utilityfog_frontend.telemetry.exporter import _write_export
+
+        path = tmp_path / "metrics.sock"
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(path))
+        server.listen(1)
+        received = []
+
+        def serve():
+            conn, _ = server.accept()
+            with conn:
+                chunks = iter(lambda: conn.recv(65536), b"")
+                received.append(b"".join(chunks))
+
+        reader = threading.Thread(target=serve)
+        reader.start()
+        payload = b"x_total 1.0\n" * 20000
+        try:
+            _write_export(str(path), payload)
+            reader.join(timeout=5)
+        finally:
+            server.close()
+
+        assert received == [payload]
+
+    def test_new_export_file_follows_umask(self, tmp_path):
+        import os
+        import stat
+
+        from utilityfog_frontend.telemetry.exporter import _write_export
+
+        target = tmp_path / "metrics.prom"
+        old_umask = os.umask(0o027)
+        try:
+            _write_export(str(target), b"new\n")
+        finally:
+            os.umask(old_umask)
+
+        assert stat.S_IMODE(os.stat(target).st_mode) == 0o640
+
+    @pytest.mark.skipif(not hasattr(__import__("os"), "symlink"), reason="needs symlinks")
+    def test_export_writes_through_symlink(self, tmp_path):
+        from utilityfog_frontend.telemetry.exporter import _write_export
+
+        real = tmp_path / "data" / "metrics.prom"
+        real.parent.mkdir()
+        real.write_bytes(b"old\n")
+        link = tmp_path / "metrics.prom"
+        link.symlink_to(real)
+
+        _write_export(str(link), b"new\n")
+
+        assert link.is_symlink()
+        assert real.read_bytes() == b"new\n"
+
+    @pytest.mark.parametrize("pretty", [True, False])
+    def test_json_encoding_matches_stdlib(self, monkeypatch, pretty):
+        import json
+
+        from utilityfog_frontend.telemetry import exporter
+
+        collector = TelemetryCollector()
+        collector.register_counter("c_total", labels={"node": "a"}).increment(2)
+        snapshot = collector.get_snapshot()
+
+        fast = exporter._dumps_json(snapshot, pretty)
+        monkeypatch.setattr(exporter, "ORJSON_AVAILABLE", False)
+        stdlib = exporter._dumps_json(snapshot, pretty)
+
+        assert json.loads(fast) == json.loads(stdlib) == snapshot
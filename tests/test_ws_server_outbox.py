@@ -0,0 +1,193 @@
+"""Per-client outboxes in ws_server.ConnectionManager.
+
+Skips when fastapi is absent (ws_server imports it at module level).
+"""
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from utilityfog_frontend.backend import ws_server
+from utilityfog_frontend.backend.ws_server import ConnectionManager
+
+
+class FakeWebSocket:
+    """Records sent frames; ``gate`` holds sends until it is set."""
+
+    def __init__(self, fail=False):
+        self.sent = []
+        self.closed_with = None
+        self.fail = fail
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.fail:
+            raise RuntimeError("connection lost")
+        await self.gate.wait()
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def _manager(size):
+    manager = ConnectionManager()
+    manager.OUTBOX_SIZE = size
+    return manager
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_writer_sends_queued_messages_in_order():
+    async def scenario():
+        manager = _manager(8)
+        ws = FakeWebSocket()
+        await manager.connect(ws, "run")
+        for i in range(3):
+            await manager.send_to_run("run", {"type": "event", "i": i})
+        await _settle()
+        manager.disconnect(ws)
+        return ws
+
+    ws = asyncio.run(scenario())
+    assert [m["i"] for m in ws.sent] == [0, 1, 2]
+
+
+def test_full_outbox_drops_oldest_snapshot_but_keeps_control_messages():
+    async def scenario():
+        manager = _manager(3)
+        ws = FakeWebSocket()
+        ws.gate.clear()
+        await manager.connect(ws, "run")
+        await manager.send_to_run("run", {"type": "init_state"})
+        await _settle()  # writer is now blocked sending init_state
+        await manager.send_to_run("run", {"type": "event"})
+        await manager.send_to_run("run", {"type": "tick", "i": 1}, droppable=True)
+        await manager.send_to_run("run", {"type": "tick", "i": 2}, droppable=True)
+        await manager.send_to_run("run", {"type": "done"})
+        ws.gate.set()
+        await _settle()
+        manager.disconnect(ws)
+        return manager, ws
+
+    manager, ws = asyncio.run(scenario())
+    assert [m["type"] for m in ws.sent] == ["init_state", "event", "tick", "done"]
+    assert ws.sent[2]["i"] == 2
+    assert manager.dropped_messages == {"run": 1}
+
+
+def test_client_is_disconnected_when_outbox_holds_only_control_messages():
+    async def scenario():
+        manager = _manager(2)
+        ws = FakeWebSocket()
+        ws.gate.clear()
+        await manager.connect(ws, "run")
+        for message_type in ("init_state", "event", "event", "done"):
+            await manager.send_to_run("run", {"type": message_type})
+            await _settle()
+        return manager, ws
+
+    manager, ws = asyncio.run(scenario())
+    assert ws.closed_with == ConnectionManager.SLOW_CLIENT_CLOSE_CODE
+    assert manager.get_run_connection_count("run") == 0
+    assert manager.dropped_messages == {}
+
+
+def test_failed_send_disconnects_only_that_client():
+    async def scenario():
+        manager = _manager(8)
+        good, bad = FakeWebSocket(), FakeWebSocket(fail=True)
+        await manager.connect(good, "run")
+        await manager.connect(bad, "run")
+        await manager.send_to_run("run", {"type": "event"})
+        await _settle()
+        count = manager.get_run_connection_count("run")
+        manager.disconnect(good)
+        return good, count
+
+    good, count = asyncio.run(scenario())
+    assert [m["type"] for m in good.sent] == ["event"]
+    assert count == 1
+
+
+def test_batch_frames_only_for_clients_that_opt_in():
+    async def scenario():
+        manager = _manager(8)
+        plain, batching = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(plain, "run")
+        await manager.connect(batching, "run")
+        manager.set_batching(batching, True)
+        await manager.send_batch_to_run("run", [
+            {"type": "tick", "data": {"step": 1}},
+            {"type": "event", "data": {"event_type": "E"}},
+        ])
+        await _settle()
+        manager.disconnect(plain)
+        manager.disconnect(batching)
+        return plain, batching
+
+    plain, batching = asyncio.run(scenario())
+    assert [m["type"] for m in plain.sent] == ["tick", "event"]
+    assert plain.sent[0]["data"] == {"step": 1}
+    assert [m["type"] for m in batching.sent] == ["batch"]
+    assert [e["type"] for e in batching.sent[0]["data"]] == ["tick", "event"]
+
+
+def test_batch_of_snapshots_is_droppable():
+    async def scenario():
+        manager = _manager(1)
+        ws = FakeWebSocket()
+        ws.gate.clear()
+        await manager.connect(ws, "run")
+        manager.set_batching(ws, True)
+        await manager.send_to_run("run", {"type": "init_state"})
+        await _settle()  # writer is now blocked sending init_state
+        await manager.send_batch_to_run("run", [{"type": "tick", "data": {}}])
+        await manager.send_batch_to_run("run", [{"type": "stats", "data": {}}])
+        connected = manager.get_run_connection_count("run")
+        await manager.send_batch_to_run("run", [{"type": "event", "data": {}}])
+        await manager.send_batch_to_run("run", [{"type": "tick", "data": {}}])
+        return manager, connected
+
+    manager, connected = asyncio.run(scenario())
+    assert connected == 1
+    assert manager.dropped_messages == {"run": 2}
+    assert manager.get_run_connection_count("run") == 0
+
+
+def test_dropped_counts_are_per_run_and_reset(monkeypatch):
+    manager = ConnectionManager()
+    manager.dropped_messages.update({"old": 5, "current": 2})
+    monkeypatch.setattr(ws_server, "connection_manager", manager)
+
+    assert ws_server.get_dropped_message_count("current") == 2
+    assert ws_server.get_dropped_message_count("unknown") == 0
+
+    ws_server.reset_dropped_message_counts()
+    assert ws_server.get_dropped_message_count("old") == 0
+
+
+def test_init_state_is_forgotten_when_last_client_leaves():
+    async def scenario():
+        manager = _manager(8)
+        first, second = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(first, "run")
+        await manager.connect(second, "run")
+        manager.init_state_text["run"] = '{"type": "init_state"}'
+        manager.disconnect(first)
+        kept = "run" in manager.init_state_text
+        manager.disconnect(second)
+        return manager, kept
+
+    manager, kept = asyncio.run(scenario())
+    assert kept
+    assert manager.init_state_text == {}
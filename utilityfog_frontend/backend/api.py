@@ -47,6 +47,7 @@ class SimulationStatus(BaseModel):
     start_time: Optional[float]
     duration: Optional[float]
     connected_clients: int
+    dropped_messages: int = 0
 
 @app.post("/api/sim/start")
 async def start_simulation(request: SimulationStartRequest):
@@ -126,7 +127,8 @@ async def get_simulation_status():
         total_steps=status_info.get("total_steps", 0),
         start_time=status_info.get("start_time"),
         duration=status_info.get("duration"),
-        connected_clients=status_info.get("connected_clients", 0)
+        connected_clients=status_info.get("connected_clients", 0),
+        dropped_messages=status_info.get("dropped_messages", 0)
     )
 
 @app.get("/api/sim/results/{run_id}")
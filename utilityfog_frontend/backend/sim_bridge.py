@@ -9,17 +9,11 @@ import asyncio
 import time
 import logging
 import threading
-from typing import Dict, Any, Optional, Callable
-from pathlib import Path
-import sys
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Callable
 
-# Add project paths
-sys.path.append('/app')
-sys.path.append('/app/testing_framework')
-
-from testing_framework.simulation_runner import SimulationRunner
-from testing_framework.test_runner import TestConfiguration
-from testing_framework.loggers import QuantumMyelinLogger, SimulationLogger
+if TYPE_CHECKING:
+    from testing_framework.simulation_runner import SimulationRunner
 
 # Import WebSocket broadcast functions
 from . import ws_server
@@ -31,8 +25,8 @@ logger = logging.getLogger(__name__)
 class SimBridge:
     """Bridge between simulation runner and WebSocket server."""
     
-    def __init__(self):
-        self.current_simulation: Optional[SimulationRunner] = None
+    def __init__(self, tick_batch_size: int = 10, tick_batch_ms: float = 250.0):
+        self.current_simulation: Optional["SimulationRunner"] = None
         self.current_run_id: Optional[str] = None
         self.current_config: Optional[Dict[str, Any]] = None
         self.simulation_thread: Optional[threading.Thread] = None
@@ -42,6 +36,27 @@ class SimBridge:
         self.current_step = 0
         self.total_steps = 0
         
+        # Ticks, events and stats are queued and handed to the server in one
+        # broadcast_batch call every tick_batch_size ticks or tick_batch_ms
+        # milliseconds, whichever comes first. Clients still get one frame
+        # per message unless they opted in to "batch" frames. A timer on the
+        # server loop flushes a batch that is due while the simulation is
+        # between callbacks.
+        self.tick_batch_size = tick_batch_size
+        self.tick_batch_ms = tick_batch_ms
+        self._outbox: List[Dict[str, Any]] = []
+        self._outbox_ticks = 0
+        self._last_flush = time.monotonic()
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        
+        # Server event loop that owns the WebSocket connections, and the
+        # broadcast currently in flight on it (see _broadcast)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending_broadcast: Optional[Future] = None
+        # Held while queueing, flushing or broadcasting, since the batch timer
+        # flushes from outside the simulation thread
+        self._broadcast_lock = threading.RLock()
+        
         logger.info("🌉 SimBridge initialized")
     
     def _worker_alive(self) -> bool:
@@ -81,7 +96,8 @@ class SimBridge:
             "total_steps": self.total_steps,
             "start_time": self.start_time,
             "duration": duration,
-            "connected_clients": ws_server.get_run_connection_count(self.current_run_id) if self.current_run_id else 0
+            "connected_clients": ws_server.get_run_connection_count(self.current_run_id) if self.current_run_id else 0,
+            "dropped_messages": ws_server.get_dropped_message_count(self.current_run_id) if self.current_run_id else 0
         }
     
     def get_results(self, run_id: str) -> Optional[Dict[str, Any]]:
@@ -102,6 +118,15 @@ class SimBridge:
         self.start_time = time.time()
         self.current_step = 0
         self.total_steps = config.get("simulation_steps", 50)
+        self._outbox = []
+        self._outbox_ticks = 0
+        self._last_flush = time.monotonic()
+        self._loop = asyncio.get_running_loop()
+        self._pending_broadcast = None
+        ws_server.reset_dropped_message_counts()
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
         
         # Run simulation in background thread to avoid blocking
         self.simulation_thread = threading.Thread(
@@ -129,11 +154,19 @@ class SimBridge:
                 "message": "Simulation stopped by user",
                 "final_step": self.current_step
             })
+            ws_server.clear_init_state(self.current_run_id)
     
     def _run_simulation_thread(self, run_id: str, config: Dict[str, Any]):
         """Run simulation in a separate thread."""
         
         try:
+            # Deferred so importing the API (server startup, status routes)
+            # does not load the simulation stack until a run starts. The
+            # project root is put on sys.path by run_server.py or the test runner.
+            from testing_framework.simulation_runner import SimulationRunner
+            from testing_framework.test_runner import TestConfiguration
+            from testing_framework.loggers import QuantumMyelinLogger, SimulationLogger
+            
             # Create test configuration
             test_config = TestConfiguration(
                 test_name=config.get("test_name", f"sim_{run_id[:8]}"),
@@ -181,48 +214,124 @@ class SimBridge:
             
             self.status = "error"
             
-            # Broadcast error
-            asyncio.run(ws_server.broadcast_error(run_id, {
+            # Broadcast error (after any messages still waiting in the batch)
+            self._flush_outbox(run_id)
+            self._broadcast(ws_server.broadcast_error(run_id, {
                 "error": str(e),
                 "step": self.current_step
             }))
         
         finally:
+            self._wait_for_broadcast()
+            # However the run ended, late joiners must not get its init_state
+            ws_server.clear_init_state(run_id)
             self.current_simulation = None
     
+    def _broadcast(self, coro):
+        """Send a broadcast from the simulation thread without waiting for it.
+        
+        The coroutine runs on the server loop while the simulation carries on
+        with its next step. At most one broadcast is in flight: the previous
+        one is awaited before the next is queued, so clients see messages in
+        the order they were produced.
+        """
+        with self._broadcast_lock:
+            if self._loop is None or self._loop.is_closed():
+                asyncio.run(coro)
+                return
+            self._wait_for_broadcast()
+            self._pending_broadcast = asyncio.run_coroutine_threadsafe(coro, self._loop)
+    
+    def _wait_for_broadcast(self):
+        """Block until the in-flight broadcast, if any, has been sent."""
+        with self._broadcast_lock:
+            pending, self._pending_broadcast = self._pending_broadcast, None
+            if pending is None:
+                return
+            try:
+                pending.result()
+            except Exception as e:
+                logger.warning(f"Broadcast failed: {e}")
+    
     def _on_init(self, run_id: str, data: Dict[str, Any]):
         """Handle simulation initialization callback."""
         logger.info(f"📊 Simulation {run_id} initialized with {len(data.get('nodes', []))} agents")
         
         # Broadcast to WebSocket clients
-        asyncio.run(ws_server.broadcast_init_state(run_id, data))
+        self._broadcast(ws_server.broadcast_init_state(run_id, data))
     
     def _on_tick(self, run_id: str, data: Dict[str, Any]):
         """Handle simulation tick callback."""
         self.current_step = data.get("step", 0)
         
         if self.current_step % 10 == 0:  # Log every 10 steps
-            logger.info(f"🎯 Simulation {run_id} step {self.current_step}")
+            logger.info("🎯 Simulation %s step %s", run_id, self.current_step)
         
-        # Broadcast to WebSocket clients (only if there are agent updates)
+        # Queue for the next batched broadcast (only if there are agent updates)
         if data.get("agent_updates"):
-            asyncio.run(ws_server.broadcast_tick(run_id, data))
+            self._outbox_ticks += 1
+            self._queue_message(run_id, "tick", data)
+    
+    def _queue_message(self, run_id: str, message_type: str, data: Dict[str, Any]):
+        """Queue a message for the next batch, flushing it once it is due."""
+        with self._broadcast_lock:
+            self._outbox.append({"type": message_type, "data": data})
+            elapsed_ms = (time.monotonic() - self._last_flush) * 1000.0
+            if self._outbox_ticks >= self.tick_batch_size or elapsed_ms >= self.tick_batch_ms:
+                self._flush_outbox(run_id)
+            elif len(self._outbox) == 1 and self._loop is not None and not self._loop.is_closed():
+                # First message of a new batch: make sure it goes out within
+                # tick_batch_ms even if no further message arrives
+                self._loop.call_soon_threadsafe(self._start_flush_timer, run_id)
+    
+    def _start_flush_timer(self, run_id: str):
+        """(Re)arm the batch deadline timer; runs on the server loop."""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+        self._flush_timer = self._loop.call_later(
+            self.tick_batch_ms / 1000.0, self._on_flush_timer, run_id
+        )
+    
+    def _on_flush_timer(self, run_id: str):
+        """Flush a batch that reached its deadline; runs on the server loop.
+        
+        The flush waits for the broadcast in flight, which needs this loop,
+        so it is handed to the default executor rather than run here.
+        """
+        self._flush_timer = None
+        self._loop.run_in_executor(None, self._flush_pending, run_id)
+    
+    def _flush_pending(self, run_id: str):
+        """Flush whatever is still queued when the batch timer fires."""
+        with self._broadcast_lock:
+            if self._outbox:
+                self._flush_outbox(run_id)
+    
+    def _flush_outbox(self, run_id: str):
+        """Broadcast queued messages to WebSocket clients as one frame."""
+        with self._broadcast_lock:
+            self._last_flush = time.monotonic()
+            if not self._outbox:
+                return
+            messages, self._outbox = self._outbox, []
+            self._outbox_ticks = 0
+            self._broadcast(ws_server.broadcast_batch(run_id, messages))
     
     def _on_event(self, run_id: str, data: Dict[str, Any]):
         """Handle simulation event callback."""
         event_type = data.get("event_type", "unknown")
-        logger.debug(f"⚡ Simulation {run_id} event: {event_type}")
+        logger.debug("⚡ Simulation %s event: %s", run_id, event_type)
         
-        # Broadcast to WebSocket clients
-        asyncio.run(ws_server.broadcast_event(run_id, data))
+        # Queue for the next batched broadcast
+        self._queue_message(run_id, "event", data)
     
     def _on_stats(self, run_id: str, data: Dict[str, Any]):
         """Handle simulation statistics callback."""
         stats = data.get("stats", {})
-        logger.debug(f"📈 Simulation {run_id} stats: {stats.get('active_agents', 0)} agents")
+        logger.debug("📈 Simulation %s stats: %s agents", run_id, stats.get('active_agents', 0))
         
-        # Broadcast to WebSocket clients
-        asyncio.run(ws_server.broadcast_stats(run_id, data))
+        # Queue for the next batched broadcast
+        self._queue_message(run_id, "stats", data)
     
     def _on_done(self, run_id: str, data: Dict[str, Any]):
         """Handle simulation completion callback."""
@@ -230,8 +339,9 @@ class SimBridge:
         
         self.status = "completed"
         
-        # Broadcast to WebSocket clients
-        asyncio.run(ws_server.broadcast_done(run_id, data))
+        # Broadcast to WebSocket clients, after any messages still queued
+        self._flush_outbox(run_id)
+        self._broadcast(ws_server.broadcast_done(run_id, data))
     
     def _on_error(self, run_id: str, data: Dict[str, Any]):
         """Handle simulation error callback."""
@@ -240,5 +350,6 @@ class SimBridge:
         
         self.status = "error"
         
-        # Broadcast to WebSocket clients
-        asyncio.run(ws_server.broadcast_error(run_id, data))
\ No newline at end of file
+        # Broadcast to WebSocket clients, after any messages still queued
+        self._flush_outbox(run_id)
+        self._broadcast(ws_server.broadcast_error(run_id, data))
\ No newline at end of file
@@ -9,21 +9,74 @@ import asyncio
 import json
 import time
 import logging
-from typing import Dict, Set, Any, Optional
+from collections import deque
+from typing import Deque, Dict, List, Set, Any, Optional, Tuple
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Query
-from fastapi.middleware.cors import CORSMiddleware
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _encode_message(message: Dict[str, Any]) -> str:
+    """Serialize an outgoing message to JSON text, using orjson when installed.
+    
+    Frames stay text: the browser client JSON.parses ``event.data`` as a string.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(message)
+
+def _decode_message(data: str) -> Any:
+    """Parse an incoming JSON message, using orjson when installed.
+    
+    orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers
+    handle malformed input the same way with either parser.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# Message types superseded by the next one of their kind, so a slow client
+# can miss some without falling out of sync
+_SNAPSHOT_TYPES = frozenset({"tick", "stats"})
+
 class ConnectionManager:
-    """Manages WebSocket connections organized by simulation runs."""
+    """Manages WebSocket connections organized by simulation runs.
+    
+    Each client has a bounded outbox drained by its own writer task, so a
+    broadcast only enqueues and a slow client never holds up the others.
+    When a client's outbox is full its oldest droppable message (a tick or
+    stats snapshot that a later one supersedes) is discarded. Control and
+    state messages are never dropped: if the outbox holds nothing else, the
+    client is disconnected so it can reconnect and resync from init_state.
+    
+    Tick, event and stats messages are sent one per frame unless a client
+    opts in to "batch" frames by subscribing with ``"batch": true``.
+    """
+    
+    # Messages queued per client before one is dropped or the client is cut off
+    OUTBOX_SIZE = 64
+    
+    # WebSocket close code 1013 ("try again later") for clients that fall behind
+    SLOW_CLIENT_CLOSE_CODE = 1013
     
     def __init__(self):
         # Dictionary of run_id -> set of websockets
         self.active_connections: Dict[str, Set[WebSocket]] = {}
         self.connection_metadata: Dict[WebSocket, Dict[str, Any]] = {}
+        # run_id -> encoded init_state message, replayed to late joiners
+        self.init_state_text: Dict[str, str] = {}
+        # run_id -> messages discarded from its clients' full outboxes
+        self.dropped_messages: Dict[str, int] = {}
+        # Pending slow-client closes; the event loop only keeps weak
+        # references to tasks, so hold them until they finish
+        self._close_tasks: Set[asyncio.Task] = set()
     
     async def connect(self, websocket: WebSocket, run_id: str):
         """Accept a new WebSocket connection for a specific run."""
@@ -32,55 +85,160 @@ class ConnectionManager:
         if run_id not in self.active_connections:
             self.active_connections[run_id] = set()
         
+        # (message text, droppable) pairs, oldest first
+        outbox: Deque[Tuple[str, bool]] = deque()
+        ready = asyncio.Event()
         self.active_connections[run_id].add(websocket)
         self.connection_metadata[websocket] = {
             "run_id": run_id,
-            "connected_at": time.time()
+            "connected_at": time.time(),
+            "outbox": outbox,
+            "ready": ready,
+            "batch": False,
+            "writer": asyncio.create_task(self._writer_loop(websocket, outbox, ready))
         }
         
-        logger.info(f"🔌 Client connected to run {run_id}. Total connections: {self.get_connection_count()}")
+        logger.info("🔌 Client connected to run %s. Total connections: %d", run_id, self.get_connection_count())
     
     def disconnect(self, websocket: WebSocket):
         """Remove a disconnected WebSocket."""
         if websocket in self.connection_metadata:
-            run_id = self.connection_metadata[websocket]["run_id"]
+            metadata = self.connection_metadata.pop(websocket)
+            run_id = metadata["run_id"]
             
             if run_id in self.active_connections:
                 self.active_connections[run_id].discard(websocket)
                 
-                # Remove empty run rooms
+                # Remove empty run rooms, and the init_state kept for them
                 if not self.active_connections[run_id]:
                     del self.active_connections[run_id]
+                    self.init_state_text.pop(run_id, None)
             
-            del self.connection_metadata[websocket]
-            logger.info(f"🔌 Client disconnected from run {run_id}. Total connections: {self.get_connection_count()}")
+            writer = metadata["writer"]
+            if writer is not asyncio.current_task():
+                writer.cancel()
+            
+            logger.info("🔌 Client disconnected from run %s. Total connections: %d", run_id, self.get_connection_count())
+    
+    async def _writer_loop(self, websocket: WebSocket, outbox: Deque[Tuple[str, bool]],
+                           ready: asyncio.Event):
+        """Send a client's queued messages in order until its connection fails."""
+        while True:
+            while not outbox:
+                ready.clear()
+                await ready.wait()
+            message_text, _ = outbox.popleft()
+            try:
+                await websocket.send_text(message_text)
+            except Exception as e:
+                logger.warning("Failed to send message to client: %s", e)
+                self.disconnect(websocket)
+                return
+    
+    def _enqueue(self, websocket: WebSocket, message_text: str, droppable: bool = False) -> bool:
+        """Queue a message for a client, making room in a full outbox.
+        
+        The oldest droppable message is discarded to make room; if there is
+        none the client is disconnected instead and False is returned.
+        """
+        metadata = self.connection_metadata[websocket]
+        outbox = metadata["outbox"]
+        if len(outbox) >= self.OUTBOX_SIZE:
+            for index, (_, queued_droppable) in enumerate(outbox):
+                if queued_droppable:
+                    del outbox[index]
+                    run_id = metadata["run_id"]
+                    self.dropped_messages[run_id] = self.dropped_messages.get(run_id, 0) + 1
+                    break
+            else:
+                logger.warning("Client of run %s fell %d messages behind; disconnecting",
+                               metadata["run_id"], len(outbox))
+                self.disconnect(websocket)
+                task = asyncio.create_task(self._close_slow_client(websocket))
+                self._close_tasks.add(task)
+                task.add_done_callback(self._close_tasks.discard)
+                return False
+        outbox.append((message_text, droppable))
+        metadata["ready"].set()
+        return True
+    
+    async def _close_slow_client(self, websocket: WebSocket):
+        """Close a client cut off by _enqueue so it reconnects and resyncs."""
+        try:
+            await websocket.close(code=self.SLOW_CLIENT_CLOSE_CODE)
+        except Exception as e:
+            logger.warning("Failed to close slow client: %s", e)
     
-    async def send_to_run(self, run_id: str, message: Dict[str, Any]):
-        """Send a message to all clients connected to a specific run."""
+    async def send_to_run(self, run_id: str, message: Dict[str, Any], droppable: bool = False):
+        """Send a message to all clients connected to a specific run.
+        
+        ``droppable`` marks messages a slow client may miss because a later
+        one supersedes them (tick and stats snapshots).
+        """
         if run_id not in self.active_connections:
             return
         
-        message_text = json.dumps(message)
-        disconnected = []
+        await self.send_text_to_run(run_id, _encode_message(message), droppable)
+    
+    async def send_text_to_run(self, run_id: str, message_text: str, droppable: bool = False):
+        """Send an already-encoded message to all clients of a run."""
+        # Copied because a client that has fallen behind is disconnected here
+        for websocket in tuple(self.active_connections.get(run_id, ())):
+            self._enqueue(websocket, message_text, droppable)
+    
+    async def send_batch_to_run(self, run_id: str, messages: List[Dict[str, Any]]):
+        """Send tick/event/stats messages to a run, batched for clients that opted in.
         
-        for websocket in self.active_connections[run_id].copy():
-            try:
-                await websocket.send_text(message_text)
-            except Exception as e:
-                logger.warning(f"Failed to send message to client: {e}")
-                disconnected.append(websocket)
+        Clients subscribed to batching get one "batch" frame; the others get
+        each message in its own frame, as broadcast_tick/event/stats send it.
+        """
+        batch_clients = []
+        single_clients = []
+        for websocket in tuple(self.active_connections.get(run_id, ())):
+            if self.connection_metadata[websocket]["batch"]:
+                batch_clients.append(websocket)
+            else:
+                single_clients.append(websocket)
         
-        # Clean up disconnected clients
-        for websocket in disconnected:
-            self.disconnect(websocket)
+        timestamp = time.time()
+        if batch_clients:
+            batch_text = _encode_message({
+                "type": "batch",
+                "data": messages,
+                "timestamp": timestamp
+            })
+            # Droppable only if every message in it is
+            droppable = all(entry["type"] in _SNAPSHOT_TYPES for entry in messages)
+            for websocket in batch_clients:
+                self._enqueue(websocket, batch_text, droppable)
+        
+        if single_clients:
+            frames = [
+                (_encode_message({
+                    "type": entry["type"],
+                    "data": entry["data"],
+                    "timestamp": timestamp
+                }), entry["type"] in _SNAPSHOT_TYPES)
+                for entry in messages
+            ]
+            for websocket in single_clients:
+                for message_text, droppable in frames:
+                    if not self._enqueue(websocket, message_text, droppable):
+                        break
+    
+    def set_batching(self, websocket: WebSocket, enabled: bool):
+        """Choose whether a client receives "batch" frames or single messages."""
+        if websocket in self.connection_metadata:
+            self.connection_metadata[websocket]["batch"] = enabled
     
     async def send_to_client(self, websocket: WebSocket, message: Dict[str, Any]):
         """Send a message to a specific client."""
-        try:
-            await websocket.send_text(json.dumps(message))
-        except Exception as e:
-            logger.warning(f"Failed to send message to client: {e}")
-            self.disconnect(websocket)
+        await self.send_text_to_client(websocket, _encode_message(message))
+    
+    async def send_text_to_client(self, websocket: WebSocket, message_text: str):
+        """Send an already-encoded message to a specific client."""
+        if websocket in self.connection_metadata:
+            self._enqueue(websocket, message_text)
     
     def get_connection_count(self) -> int:
         """Get total number of active connections."""
@@ -93,17 +251,12 @@ class ConnectionManager:
 # Global connection manager
 connection_manager = ConnectionManager()
 
-# WebSocket app
-ws_app = FastAPI(title="UtilityFog WebSocket Server")
+# Largest client message (in characters) the endpoint will parse
+MAX_CLIENT_MESSAGE_CHARS = 64 * 1024
 
-# Add CORS middleware
-ws_app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Configure appropriately for production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# WebSocket app. No CORS middleware: it only acts on HTTP requests, and
+# this app serves nothing but the WebSocket endpoint.
+ws_app = FastAPI(title="UtilityFog WebSocket Server")
 
 @ws_app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket, run_id: str = Query(...)):
@@ -119,11 +272,27 @@ async def websocket_endpoint(websocket: WebSocket, run_id: str = Query(...)):
             "timestamp": time.time()
         })
         
+        # Clients joining a run already in progress get its initial state,
+        # sent from the copy encoded once at broadcast time
+        init_state_text = connection_manager.init_state_text.get(run_id)
+        if init_state_text is not None:
+            await connection_manager.send_text_to_client(websocket, init_state_text)
+        
         while True:
             try:
                 # Listen for client messages (ping, config updates, etc.)
                 data = await websocket.receive_text()
-                message = json.loads(data)
+                
+                # Control messages are tiny; refuse to parse anything larger
+                if len(data) > MAX_CLIENT_MESSAGE_CHARS:
+                    await connection_manager.send_to_client(websocket, {
+                        "type": "error",
+                        "message": "Message too large",
+                        "timestamp": time.time()
+                    })
+                    continue
+                
+                message = _decode_message(data)
                 
                 await handle_client_message(websocket, run_id, message)
                 
@@ -147,28 +316,45 @@ async def websocket_endpoint(websocket: WebSocket, run_id: str = Query(...)):
     finally:
         connection_manager.disconnect(websocket)
 
+# Pong reply with the timestamp spliced in, so keepalives skip the encoder
+# (repr of a float is its JSON form)
+_PONG_PREFIX = '{"type":"pong","timestamp":'
+
+async def _handle_ping(websocket: WebSocket, run_id: str, message: Dict[str, Any]):
+    """Respond to a keepalive ping with a pong."""
+    await connection_manager.send_text_to_client(
+        websocket, f"{_PONG_PREFIX}{time.time()!r}}}"
+    )
+
+async def _handle_subscribe(websocket: WebSocket, run_id: str, message: Dict[str, Any]):
+    """Confirm a client's subscription to specific event types."""
+    event_types = message.get("event_types", [])
+    # Store subscription preferences (implement as needed)
+    # Only clients that can unpack "batch" frames ask for them
+    batch = message.get("batch") is True
+    connection_manager.set_batching(websocket, batch)
+    await connection_manager.send_to_client(websocket, {
+        "type": "subscription_confirmed",
+        "event_types": event_types,
+        "batch": batch,
+        "timestamp": time.time()
+    })
+
+# Client message type -> handler
+_CLIENT_MESSAGE_HANDLERS = {
+    "ping": _handle_ping,
+    "subscribe": _handle_subscribe,
+}
+
 async def handle_client_message(websocket: WebSocket, run_id: str, message: Dict[str, Any]):
     """Handle incoming messages from WebSocket clients."""
     
     message_type = message.get("type")
+    # Non-string types (e.g. a JSON list) are unhashable; treat as unknown
+    handler = _CLIENT_MESSAGE_HANDLERS.get(message_type) if isinstance(message_type, str) else None
     
-    if message_type == "ping":
-        # Respond with pong
-        await connection_manager.send_to_client(websocket, {
-            "type": "pong",
-            "timestamp": time.time()
-        })
-        
-    elif message_type == "subscribe":
-        # Client wants to subscribe to specific event types
-        event_types = message.get("event_types", [])
-        # Store subscription preferences (implement as needed)
-        await connection_manager.send_to_client(websocket, {
-            "type": "subscription_confirmed",
-            "event_types": event_types,
-            "timestamp": time.time()
-        })
-        
+    if handler is not None:
+        await handler(websocket, run_id, message)
     else:
         # Unknown message type
         await connection_manager.send_to_client(websocket, {
@@ -186,7 +372,9 @@ async def broadcast_init_state(run_id: str, data: Dict[str, Any]):
         "data": data,
         "timestamp": time.time()
     }
-    await connection_manager.send_to_run(run_id, message)
+    message_text = _encode_message(message)
+    connection_manager.init_state_text[run_id] = message_text
+    await connection_manager.send_text_to_run(run_id, message_text)
 
 async def broadcast_tick(run_id: str, data: Dict[str, Any]):
     """Broadcast simulation tick update."""
@@ -195,7 +383,18 @@ async def broadcast_tick(run_id: str, data: Dict[str, Any]):
         "data": data,
         "timestamp": time.time()
     }
-    await connection_manager.send_to_run(run_id, message)
+    await connection_manager.send_to_run(run_id, message, droppable=True)
+
+async def broadcast_batch(run_id: str, messages: List[Dict[str, Any]]):
+    """Broadcast several tick/event/stats messages, oldest first.
+    
+    Each entry is ``{"type": ..., "data": ...}`` with the same data as the
+    corresponding single-message broadcast. Clients that subscribed with
+    ``"batch": true`` receive them in one "batch" frame; a batch holding only
+    tick and stats snapshots may be dropped for a slow client, like those
+    messages. Every other client receives one frame per message.
+    """
+    await connection_manager.send_batch_to_run(run_id, messages)
 
 async def broadcast_event(run_id: str, data: Dict[str, Any]):
     """Broadcast simulation event."""
@@ -213,7 +412,7 @@ async def broadcast_stats(run_id: str, data: Dict[str, Any]):
         "data": data,
         "timestamp": time.time()
     }
-    await connection_manager.send_to_run(run_id, message)
+    await connection_manager.send_to_run(run_id, message, droppable=True)
 
 async def broadcast_done(run_id: str, data: Dict[str, Any]):
     """Broadcast simulation completion."""
@@ -222,6 +421,7 @@ async def broadcast_done(run_id: str, data: Dict[str, Any]):
         "data": data,
         "timestamp": time.time()
     }
+    clear_init_state(run_id)
     await connection_manager.send_to_run(run_id, message)
 
 async def broadcast_error(run_id: str, data: Dict[str, Any]):
@@ -231,12 +431,25 @@ async def broadcast_error(run_id: str, data: Dict[str, Any]):
         "data": data,
         "timestamp": time.time()
     }
+    clear_init_state(run_id)
     await connection_manager.send_to_run(run_id, message)
 
+def clear_init_state(run_id: str):
+    """Stop replaying a run's init_state to clients that join later."""
+    connection_manager.init_state_text.pop(run_id, None)
+
 def get_connection_count() -> int:
     """Get total connection count (for API status)."""
     return connection_manager.get_connection_count()
 
 def get_run_connection_count(run_id: str) -> int:
     """Get connection count for specific run."""
-    return connection_manager.get_run_connection_count(run_id)
\ No newline at end of file
+    return connection_manager.get_run_connection_count(run_id)
+
+def get_dropped_message_count(run_id: str) -> int:
+    """Get the number of messages dropped for a run's slow clients (for API status)."""
+    return connection_manager.dropped_messages.get(run_id, 0)
+
+def reset_dropped_message_counts():
+    """Forget drop counts of earlier runs (called when a new run starts)."""
+    connection_manager.dropped_messages.clear()
\ No newline at end of file
@@ -6,7 +6,9 @@ This module provides command-line visualization tools for state transitions,
 message flow rendering, and interactive tree visualization.
 """
 
-from .renderer import TreeRenderer, FlowRenderer, StateRenderer, InteractiveRenderer
+from .renderer import (
+    TreeRenderer, FlowRenderer, StateRenderer, InteractiveRenderer, RenderContext,
+)
 from .cli import VisualizationCLI
 from .exporters import HTMLExporter, SVGExporter, TextExporter, JSONExporter
 from .models import (
@@ -19,6 +21,7 @@ __all__ = [
     'FlowRenderer',
     'StateRenderer',
     'InteractiveRenderer',
+    'RenderContext',
     'VisualizationCLI',
     'HTMLExporter',
     'SVGExporter',
@@ -124,6 +124,7 @@ Examples:
                 json_data = json.load(f)
 
             data = VisualizationData()
+            now = time.time()
             
             # Load nodes
             for node_id, node_data in json_data.get('nodes', {}).items():
@@ -135,12 +136,13 @@ Examples:
                     children=node_data.get('children', []),
                     position=tuple(node_data.get('position', [0.0, 0.0])),
                     metadata=node_data.get('metadata', {}),
-                    last_updated=node_data.get('last_updated', time.time())
+                    last_updated=node_data.get('last_updated', now)
                 )
                 data.add_node(node)
             
-            # Load messages
-            for msg_data in json_data.get('messages', []):
+            # Load messages (oldest first, so the retained window keeps the
+            # newest entries and its timestamp column stays sorted)
+            for msg_data in sorted(json_data.get('messages', []), key=lambda m: m['timestamp']):
                 message = MessageFlow(
                     id=msg_data['id'],
                     source_id=msg_data['source_id'],
@@ -153,8 +155,8 @@ Examples:
                 )
                 data.add_message(message)
             
-            # Load transitions
-            for trans_data in json_data.get('transitions', []):
+            # Load transitions (oldest first, as for messages)
+            for trans_data in sorted(json_data.get('transitions', []), key=lambda t: t['timestamp']):
                 transition = StateTransition(
                     node_id=trans_data['node_id'],
                     from_state=NodeState(trans_data['from_state']),
@@ -335,6 +337,7 @@ Examples:
         nodes = {}
         messages = []
         transitions = []
+        now = time.time()
         
         # Generate nodes
         states = list(NodeState)
@@ -361,7 +364,7 @@ Examples:
                     'cpu_usage': random.uniform(0, 100),
                     'memory_mb': random.randint(100, 1000)
                 },
-                'last_updated': time.time() - random.uniform(0, 3600)
+                'last_updated': now - random.uniform(0, 3600)
             }
         
         # Generate messages
@@ -376,7 +379,7 @@ Examples:
                 'target_id': target_id,
                 'message_type': random.choice(msg_types).value,
                 'content': f"Message content {i}",
-                'timestamp': time.time() - random.uniform(0, 300),
+                'timestamp': now - random.uniform(0, 300),
                 'status': random.choice(['pending', 'delivered', 'failed']),
                 'metadata': {
                     'size_bytes': random.randint(100, 10000)
@@ -393,7 +396,7 @@ Examples:
                 'node_id': node_id,
                 'from_state': from_state.value,
                 'to_state': to_state.value,
-                'timestamp': time.time() - random.uniform(0, 600),
+                'timestamp': now - random.uniform(0, 600),
                 'trigger': random.choice(['heartbeat', 'error', 'user_action', 'timeout']),
                 'metadata': {
                     'duration_ms': random.randint(10, 1000)
@@ -401,7 +404,7 @@ Examples:
             })
         
         return {
-            'timestamp': time.time(),
+            'timestamp': now,
             'nodes': nodes,
             'messages': messages,
             'transitions': transitions,
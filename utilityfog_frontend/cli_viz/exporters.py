@@ -147,27 +147,21 @@ class HTMLExporter(BaseExporter):
     
     def _generate_flows_html(self, data: VisualizationData) -> str:
         """Generate HTML for message flows."""
-        recent_messages = data.get_recent_messages(300.0)  # Last 5 minutes
+        now = time.time()
+        by_type = data.get_recent_messages_by_type(300.0, now)  # Last 5 minutes
         
-        if not recent_messages:
+        if not by_type:
             return "<p>No recent message flows to display</p>"
         
         html = ["<div class='flows-container'>"]
         
-        # Group by message type
-        by_type = {}
-        for msg in recent_messages:
-            if msg.message_type not in by_type:
-                by_type[msg.message_type] = []
-            by_type[msg.message_type].append(msg)
-        
         for msg_type, messages in by_type.items():
             html.append("<div class='message-type-section'>")
             html.append(f"<h3>{msg_type.value.title()} Messages ({len(messages)})</h3>")
             html.append("<div class='messages-list'>")
             
             for msg in sorted(messages, key=lambda m: m.timestamp, reverse=True):
-                age = time.time() - msg.timestamp
+                age = now - msg.timestamp
                 status_class = f"status-{_escape(str(msg.status))}"
                 
                 source_name = self._get_node_name(msg.source_id, data.nodes)
@@ -193,7 +187,8 @@ class HTMLExporter(BaseExporter):
     
     def _generate_transitions_html(self, data: VisualizationData) -> str:
         """Generate HTML for state transitions."""
-        recent_transitions = data.get_recent_transitions(300.0)  # Last 5 minutes
+        now = time.time()
+        recent_transitions = data.get_recent_transitions(300.0, now)  # Last 5 minutes
         
         if not recent_transitions:
             return "<p>No recent state transitions to display</p>"
@@ -204,7 +199,7 @@ class HTMLExporter(BaseExporter):
         
         html.append("<div class='transitions-list'>")
         for trans in transitions:
-            age = time.time() - trans.timestamp
+            age = now - trans.timestamp
             node_name = self._get_node_name(trans.node_id, data.nodes)
             
             from_class = f"state-{trans.from_state.value}"
@@ -4,9 +4,18 @@ Data models for CLI visualization system.
 """
 
 import time
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any
+from array import array
+from bisect import bisect_left
+from collections import deque
+from dataclasses import dataclass, field, fields
+from typing import Deque, Dict, List, Optional, Any, Tuple
 from enum import Enum
+from operator import attrgetter
+
+
+def _count_descents(column: array, end: int) -> int:
+    """Count adjacent out-of-order pairs ``(i - 1, i)`` for ``1 <= i <= end``."""
+    return sum(1 for i in range(1, min(end + 1, len(column))) if column[i] < column[i - 1])
 
 
 class NodeState(Enum):
@@ -18,6 +27,11 @@ class NodeState(Enum):
     UNKNOWN = "unknown"
 
 
+# TreeNode fields whose assignment must be reflected in the owning
+# container's indexes or subtree versions.
+_TRACKED_FIELDS = frozenset({"name", "state", "parent_id", "metadata"})
+
+
 class MessageType(Enum):
     """Types of messages in the system."""
     COORDINATION = "coordination"
@@ -27,9 +41,20 @@ class MessageType(Enum):
     CONTROL = "control"
 
 
-@dataclass
-class TreeNode:
-    """Represents a node in the fractal tree visualization."""
+class _OwnerSlot:
+    """Holds the container a node is registered with, outside the dataclass fields."""
+    __slots__ = ("_owner",)
+
+
+@dataclass(slots=True)
+class TreeNode(_OwnerSlot):
+    """Represents a node in the fractal tree visualization.
+
+    Assigning ``name``, ``state``, ``parent_id`` or ``metadata`` on a node
+    registered with a ``VisualizationData`` keeps the container's indexes
+    and cached renderings in sync. Editing ``metadata`` in place is not
+    seen; call ``VisualizationData.touch_node`` afterwards.
+    """
     id: str
     name: str
     state: NodeState = NodeState.UNKNOWN
@@ -49,13 +74,49 @@ class TreeNode:
         if child_id in self.children:
             self.children.remove(child_id)
     
-    def update_state(self, new_state: NodeState) -> None:
-        """Update the node state and timestamp."""
+    def update_state(self, new_state: NodeState, now: Optional[float] = None) -> None:
+        """Update the node state and timestamp (``now`` defaults to the current time)."""
+        self.last_updated = time.time() if now is None else now
         self.state = new_state
-        self.last_updated = time.time()
 
 
-@dataclass
+class _RegisteredTreeNode(TreeNode):
+    """Class a TreeNode is switched to while registered with a container.
+
+    Only registered nodes pay for the assignment hook; building and using
+    free-standing nodes costs the same as a plain slotted dataclass.
+    """
+    __slots__ = ()
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        if name in _TRACKED_FIELDS:
+            # Copies of a registered node carry the class but not the owner.
+            owner = getattr(self, "_owner", None)
+            if owner is not None:
+                owner._node_changed(self, name)
+    
+    def __eq__(self, other: object) -> bool:
+        # The dataclass __eq__ requires identical classes; registration must
+        # not change equality with free-standing nodes.
+        if not isinstance(other, TreeNode):
+            return NotImplemented
+        return _compared_fields(self) == _compared_fields(other)
+    
+    def __repr__(self) -> str:
+        return TreeNode.__repr__(self).replace(type(self).__qualname__, "TreeNode", 1)
+
+
+_compared_fields = attrgetter(*(f.name for f in fields(TreeNode) if f.compare))
+
+
+def _register_node(node: TreeNode, owner: Optional["VisualizationData"]) -> None:
+    """Attach a node to ``owner`` (or detach it when None), toggling its hook."""
+    node.__class__ = TreeNode if owner is None else _RegisteredTreeNode
+    object.__setattr__(node, "_owner", owner)
+
+
+@dataclass(slots=True)
 class MessageFlow:
     """Represents a message flow between nodes."""
     id: str
@@ -67,19 +128,19 @@ class MessageFlow:
     status: str = "pending"  # pending, delivered, failed
     metadata: Dict[str, Any] = field(default_factory=dict)
     
-    def mark_delivered(self) -> None:
+    def mark_delivered(self, now: Optional[float] = None) -> None:
         """Mark the message as delivered."""
         self.status = "delivered"
-        self.metadata["delivered_at"] = time.time()
+        self.metadata["delivered_at"] = time.time() if now is None else now
     
-    def mark_failed(self, error: str) -> None:
+    def mark_failed(self, error: str, now: Optional[float] = None) -> None:
         """Mark the message as failed."""
         self.status = "failed"
         self.metadata["error"] = error
-        self.metadata["failed_at"] = time.time()
+        self.metadata["failed_at"] = time.time() if now is None else now
 
 
-@dataclass
+@dataclass(slots=True)
 class StateTransition:
     """Represents a state transition event."""
     node_id: str
@@ -89,22 +150,174 @@ class StateTransition:
     trigger: str = "unknown"
     metadata: Dict[str, Any] = field(default_factory=dict)
     
-    def duration_since(self) -> float:
+    def duration_since(self, now: Optional[float] = None) -> float:
         """Get duration since this transition occurred."""
-        return time.time() - self.timestamp
+        return (time.time() if now is None else now) - self.timestamp
 
 
-@dataclass
+@dataclass(slots=True)
 class VisualizationData:
-    """Container for all visualization data."""
+    """Container for all visualization data.
+
+    Add and remove entries of ``nodes`` through ``add_node``/``remove_node``
+    so the indexes stay consistent. After mutating a node's ``metadata`` dict
+    in place, call ``touch_node`` so cached renderings are refreshed.
+
+    ``messages`` and ``transitions`` are tuples; add entries through
+    ``add_message``/``add_transition``. Assigning a new sequence to either
+    is allowed and re-indexes it on next use.
+    """
     nodes: Dict[str, TreeNode] = field(default_factory=dict)
-    messages: List[MessageFlow] = field(default_factory=list)
-    transitions: List[StateTransition] = field(default_factory=list)
+    messages: Tuple[MessageFlow, ...] = ()
+    transitions: Tuple[StateTransition, ...] = ()
     metadata: Dict[str, Any] = field(default_factory=dict)
+    # Live indexes over ``nodes`` (dicts used as insertion-ordered sets) so
+    # per-frame queries don't rescan every node.
+    _active: Dict[str, None] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _roots: Dict[str, None] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # Bumped whenever ``_active`` gains or loses a member.
+    _active_version: int = field(default=0, init=False, repr=False, compare=False)
+    _active_cache: Optional[List[TreeNode]] = field(default=None, init=False, repr=False, compare=False)
+    _active_cache_version: tuple = field(default=(-1, -1), init=False, repr=False, compare=False)
+    # Bumped on every structural change; derived views are cached against it.
+    _hierarchy_version: int = field(default=0, init=False, repr=False, compare=False)
+    _hierarchy_cache: Optional[Dict[str, List[str]]] = field(default=None, init=False, repr=False, compare=False)
+    _hierarchy_cache_version: int = field(default=-1, init=False, repr=False, compare=False)
+    _roots_cache: Optional[List[TreeNode]] = field(default=None, init=False, repr=False, compare=False)
+    _roots_cache_version: int = field(default=-1, init=False, repr=False, compare=False)
+    # Per-node counters bumped when a node or any of its descendants changes,
+    # letting renderers reuse output for untouched subtrees.
+    _subtree_versions: Dict[str, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # Nodes changed since the versions above were last brought up to date;
+    # propagating to ancestors waits until a version is read.
+    _dirty_nodes: Dict[str, None] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # ``messages`` bucketed by type, in arrival order; mirrors the retained
+    # window so flow views can skip regrouping every frame.
+    _messages_by_type: Dict[MessageType, Deque[MessageFlow]] = field(
+        default_factory=lambda: {msg_type: deque() for msg_type in MessageType},
+        init=False, repr=False, compare=False,
+    )
+    # Hot timestamp columns, parallel to ``messages`` / ``transitions``, so
+    # time-window queries scan packed floats instead of dataclass attributes.
+    _msg_timestamps: array = field(default_factory=lambda: array('d'), init=False, repr=False, compare=False)
+    _trans_timestamps: array = field(default_factory=lambda: array('d'), init=False, repr=False, compare=False)
+    # Out-of-order neighbours in each column; while zero the column is sorted
+    # and time-window queries can bisect instead of scanning.
+    _msg_descents: int = field(default=0, init=False, repr=False, compare=False)
+    _trans_descents: int = field(default=0, init=False, repr=False, compare=False)
+    # The ``messages`` / ``transitions`` tuples the columns above describe;
+    # a reassigned attribute no longer matches and is re-indexed.
+    _indexed_messages: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+    _indexed_transitions: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __post_init__(self) -> None:
+        for node in self.nodes.values():
+            self._index_node(node)
+        self._index_messages()
+        self._index_transitions()
+    
+    def _index_messages(self) -> None:
+        """Rebuild the message buckets and timestamp column from ``messages``."""
+        if self._indexed_messages is self.messages:
+            return
+        self.messages = tuple(self.messages)
+        for bucket in self._messages_by_type.values():
+            bucket.clear()
+        for message in self.messages:
+            self._messages_by_type[message.message_type].append(message)
+        self._msg_timestamps = array('d', [message.timestamp for message in self.messages])
+        self._msg_descents = _count_descents(self._msg_timestamps, len(self._msg_timestamps))
+        self._indexed_messages = self.messages
+    
+    def _index_transitions(self) -> None:
+        """Rebuild the transition timestamp column from ``transitions``."""
+        if self._indexed_transitions is self.transitions:
+            return
+        self.transitions = tuple(self.transitions)
+        self._trans_timestamps = array('d', [t.timestamp for t in self.transitions])
+        self._trans_descents = _count_descents(self._trans_timestamps, len(self._trans_timestamps))
+        self._indexed_transitions = self.transitions
+    
+    def _index_node(self, node: TreeNode) -> None:
+        """Register a node with the container and seed its index membership."""
+        _register_node(node, self)
+        self._index_state(node)
+        if node.parent_id is None:
+            self._roots[node.id] = None
+    
+    def _index_state(self, node: TreeNode) -> None:
+        """Refresh the active-node index after a state change."""
+        if node.state == NodeState.ACTIVE:
+            if node.id not in self._active:
+                self._active[node.id] = None
+                self._active_version += 1
+        elif self._active.pop(node.id, 0) is None:
+            self._active_version += 1
+    
+    def _rebuild_roots(self) -> None:
+        """Recompute the root index so it follows ``nodes`` order."""
+        self._roots = {node_id: None for node_id, node in self.nodes.items()
+                       if node.parent_id is None}
+    
+    def _node_changed(self, node: TreeNode, name: str) -> None:
+        """Re-index a registered node after one of its fields was assigned."""
+        if self.nodes.get(node.id) is not node:
+            return
+        if name == "parent_id":
+            self._rebuild_roots()
+            self._hierarchy_version += 1
+            return
+        if name == "state":
+            self._index_state(node)
+        self.touch_node(node.id)
+    
+    def touch_node(self, node_id: str) -> None:
+        """Mark a node (and so every ancestor's subtree) as changed.
+
+        Assigning a node's fields calls this automatically; call it after
+        editing a node's ``metadata`` dict in place so cached renderings are
+        refreshed. Ancestors are updated on the next ``get_subtree_version``
+        call, so each change costs the same however deep the node is.
+        """
+        self._dirty_nodes[node_id] = None
+    
+    def _propagate_dirty_nodes(self) -> None:
+        """Bump the subtree version of every changed node and its ancestors once."""
+        versions = self._subtree_versions
+        bumped = set()
+        for node_id in self._dirty_nodes:
+            # Stops at the first ancestor already bumped, which also ends
+            # walks around a parent_id cycle.
+            while node_id not in bumped:
+                node = self.nodes.get(node_id)
+                if node is None:
+                    break
+                bumped.add(node_id)
+                versions[node_id] = versions.get(node_id, 0) + 1
+                node_id = node.parent_id
+        self._dirty_nodes.clear()
+    
+    def get_hierarchy_version(self) -> int:
+        """Get a counter that changes whenever nodes are added, removed or re-parented."""
+        return self._hierarchy_version
+    
+    def get_subtree_version(self, node_id: str) -> tuple[int, int]:
+        """Get a token that changes whenever the subtree under a node changes."""
+        if self._dirty_nodes:
+            self._propagate_dirty_nodes()
+        return self._hierarchy_version, self._subtree_versions.get(node_id, 0)
     
     def add_node(self, node: TreeNode) -> None:
         """Add a node to the visualization."""
+        previous = self.nodes.get(node.id)
+        if previous is not None and previous is not node:
+            _register_node(previous, None)
         self.nodes[node.id] = node
+        self._index_node(node)
+        if previous is not None:
+            # A replacement keeps its key's position but may change root status.
+            self._rebuild_roots()
+        self._hierarchy_version += 1
     
     def remove_node(self, node_id: str) -> None:
         """Remove a node from the visualization."""
@@ -114,58 +327,132 @@ class VisualizationData:
             if node.parent_id and node.parent_id in self.nodes:
                 self.nodes[node.parent_id].remove_child(node_id)
             
-            # Remove children references
+            # Remove children references (bypassing the per-assignment
+            # re-index; roots are rebuilt once below)
             for child_id in node.children:
                 if child_id in self.nodes:
-                    self.nodes[child_id].parent_id = None
+                    object.__setattr__(self.nodes[child_id], "parent_id", None)
             
             del self.nodes[node_id]
+            _register_node(node, None)
+            if self._active.pop(node_id, 0) is None:
+                self._active_version += 1
+            self._rebuild_roots()
+            self._hierarchy_version += 1
     
     def add_message(self, message: MessageFlow) -> None:
         """Add a message flow to the visualization."""
-        self.messages.append(message)
+        self._index_messages()
+        self.messages += (message,)
+        self._messages_by_type[message.message_type].append(message)
+        if self._msg_timestamps and message.timestamp < self._msg_timestamps[-1]:
+            self._msg_descents += 1
+        self._msg_timestamps.append(message.timestamp)
         # Keep only recent messages (last 100)
         if len(self.messages) > 100:
+            # Arrival order is shared with the buckets, so every evicted
+            # message is at the head of its own bucket.
+            for evicted in self.messages[:-100]:
+                self._messages_by_type[evicted.message_type].popleft()
             self.messages = self.messages[-100:]
+            evicted = len(self._msg_timestamps) - 100
+            self._msg_descents -= _count_descents(self._msg_timestamps, evicted)
+            del self._msg_timestamps[:evicted]
+        self._indexed_messages = self.messages
     
     def add_transition(self, transition: StateTransition) -> None:
         """Add a state transition to the visualization."""
-        self.transitions.append(transition)
+        self._index_transitions()
+        self.transitions += (transition,)
+        if self._trans_timestamps and transition.timestamp < self._trans_timestamps[-1]:
+            self._trans_descents += 1
+        self._trans_timestamps.append(transition.timestamp)
         # Keep only recent transitions (last 50)
         if len(self.transitions) > 50:
             self.transitions = self.transitions[-50:]
+            evicted = len(self._trans_timestamps) - 50
+            self._trans_descents -= _count_descents(self._trans_timestamps, evicted)
+            del self._trans_timestamps[:evicted]
+        self._indexed_transitions = self.transitions
         
         # Update node state if it exists
         if transition.node_id in self.nodes:
             self.nodes[transition.node_id].update_state(transition.to_state)
     
     def get_active_nodes(self) -> List[TreeNode]:
-        """Get all nodes in active state."""
-        return [node for node in self.nodes.values() if node.state == NodeState.ACTIVE]
+        """Get all nodes in active state, in ``nodes`` order."""
+        version = (self._hierarchy_version, self._active_version)
+        if self._active_cache_version != version:
+            active = self._active
+            self._active_cache = [node for node_id, node in self.nodes.items()
+                                  if node_id in active]
+            self._active_cache_version = version
+        return list(self._active_cache)
     
-    def get_recent_messages(self, seconds: float = 60.0) -> List[MessageFlow]:
-        """Get messages from the last N seconds."""
-        cutoff = time.time() - seconds
-        return [msg for msg in self.messages if msg.timestamp >= cutoff]
+    def get_recent_messages(self, seconds: float = 60.0, now: Optional[float] = None) -> List[MessageFlow]:
+        """Get messages from the last N seconds before ``now`` (default: current time)."""
+        cutoff = (time.time() if now is None else now) - seconds
+        self._index_messages()
+        messages = self.messages
+        if not self._msg_descents:
+            return list(messages[bisect_left(self._msg_timestamps, cutoff):])
+        return [messages[i] for i, ts in enumerate(self._msg_timestamps) if ts >= cutoff]
     
-    def get_recent_transitions(self, seconds: float = 60.0) -> List[StateTransition]:
-        """Get transitions from the last N seconds."""
-        cutoff = time.time() - seconds
-        return [trans for trans in self.transitions if trans.timestamp >= cutoff]
+    def get_recent_messages_by_type(self, seconds: float = 60.0,
+                                    now: Optional[float] = None) -> Dict[MessageType, List[MessageFlow]]:
+        """Get messages from the last N seconds grouped by type (empty types omitted)."""
+        cutoff = (time.time() if now is None else now) - seconds
+        self._index_messages()
+        by_type = {}
+        for msg_type, bucket in self._messages_by_type.items():
+            if self._msg_descents:
+                recent = [msg for msg in bucket if msg.timestamp >= cutoff]
+            else:
+                # Sorted buckets: walk back from the newest entry and stop
+                # at the first one outside the window.
+                recent = []
+                for msg in reversed(bucket):
+                    if msg.timestamp < cutoff:
+                        break
+                    recent.append(msg)
+                recent.reverse()
+            if recent:
+                by_type[msg_type] = recent
+        return by_type
+    
+    def get_recent_transitions(self, seconds: float = 60.0, now: Optional[float] = None) -> List[StateTransition]:
+        """Get transitions from the last N seconds before ``now`` (default: current time)."""
+        cutoff = (time.time() if now is None else now) - seconds
+        self._index_transitions()
+        transitions = self.transitions
+        if not self._trans_descents:
+            return list(transitions[bisect_left(self._trans_timestamps, cutoff):])
+        return [transitions[i] for i, ts in enumerate(self._trans_timestamps) if ts >= cutoff]
     
     def get_node_hierarchy(self) -> Dict[str, List[str]]:
-        """Get the hierarchical structure of nodes."""
+        """Get the hierarchical structure of nodes.
+
+        The result is cached until the next structural change and shared
+        between callers, so it must be treated as read-only.
+        """
+        if self._hierarchy_cache_version == self._hierarchy_version:
+            return self._hierarchy_cache
         hierarchy = {}
         for node in self.nodes.values():
             if node.parent_id:
                 if node.parent_id not in hierarchy:
                     hierarchy[node.parent_id] = []
                 hierarchy[node.parent_id].append(node.id)
+        self._hierarchy_cache = hierarchy
+        self._hierarchy_cache_version = self._hierarchy_version
         return hierarchy
     
     def get_root_nodes(self) -> List[TreeNode]:
         """Get all root nodes (nodes without parents)."""
-        return [node for node in self.nodes.values() if node.parent_id is None]
+        if self._roots_cache_version != self._hierarchy_version:
+            self._roots_cache = [self.nodes[node_id] for node_id in self._roots]
+            self._roots_cache_version = self._hierarchy_version
+        return list(self._roots_cache)
 
 
 # Color schemes for different visualization themes
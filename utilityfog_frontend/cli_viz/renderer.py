@@ -3,27 +3,133 @@
 Rendering engines for different visualization types.
 """
 
+import io
 import time
-from typing import Dict, List
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
 from abc import ABC, abstractmethod
 
 from .models import (
-    VisualizationData, TreeNode, NodeState, MessageType, COLOR_SCHEMES, MESSAGE_COLORS
+    VisualizationData, TreeNode, MessageFlow, StateTransition, NodeState, MessageType,
+    COLOR_SCHEMES, MESSAGE_COLORS
 )
 
 
+_STATE_SYMBOLS = {
+    NodeState.ACTIVE: "●",
+    NodeState.INACTIVE: "○",
+    NodeState.PROCESSING: "◐",
+    NodeState.ERROR: "✗",
+    NodeState.UNKNOWN: "?"
+}
+
+_ANSI_RESET = "\x1b[0m"
+
+_ANSI_NAMED_COLORS = {
+    "red": "31",
+    "green": "32",
+    "yellow": "33",
+    "blue": "34",
+    "purple": "35",
+    "white": "37",
+    "gray": "90",
+}
+
+
+def _ansi_color(color: str) -> str:
+    """Translate a color-scheme entry (name or ``#rrggbb``) to an SGR escape."""
+    if color.startswith("#") and len(color) == 7:
+        r, g, b = (int(color[i:i + 2], 16) for i in (1, 3, 5))
+        return f"\x1b[38;2;{r};{g};{b}m"
+    return f"\x1b[{_ANSI_NAMED_COLORS.get(color, '37')}m"
+
+
+_STATUS_SYMBOLS = {
+    "pending": "⏳",
+    "delivered": "✓",
+    "failed": "✗"
+}
+
+
+@dataclass(slots=True)
+class RenderContext:
+    """Per-frame snapshot shared by the renderers drawing the same data.
+
+    Pins a single ``now`` for the frame and memoizes time-window queries,
+    so views rendered from one context don't repeat the same lookups.
+    """
+    data: VisualizationData
+    now: float = field(default_factory=time.time)
+    _messages: Dict[float, List[MessageFlow]] = field(default_factory=dict, repr=False)
+    _messages_by_type: Dict[float, Dict[MessageType, List[MessageFlow]]] = field(
+        default_factory=dict, repr=False
+    )
+    _transitions: Dict[float, List[StateTransition]] = field(default_factory=dict, repr=False)
+    
+    def get_node_hierarchy(self) -> Dict[str, List[str]]:
+        """Get the node hierarchy (cached by the data container)."""
+        return self.data.get_node_hierarchy()
+    
+    def get_recent_messages(self, seconds: float = 60.0) -> List[MessageFlow]:
+        """Get messages from the last N seconds of this frame."""
+        if seconds not in self._messages:
+            self._messages[seconds] = self.data.get_recent_messages(seconds, self.now)
+        return self._messages[seconds]
+    
+    def get_recent_messages_by_type(self, seconds: float = 60.0) -> Dict[MessageType, List[MessageFlow]]:
+        """Get messages from the last N seconds of this frame, grouped by type."""
+        if seconds not in self._messages_by_type:
+            self._messages_by_type[seconds] = self.data.get_recent_messages_by_type(seconds, self.now)
+        return self._messages_by_type[seconds]
+    
+    def get_recent_transitions(self, seconds: float = 60.0) -> List[StateTransition]:
+        """Get transitions from the last N seconds of this frame."""
+        if seconds not in self._transitions:
+            self._transitions[seconds] = self.data.get_recent_transitions(seconds, self.now)
+        return self._transitions[seconds]
+
+
 class BaseRenderer(ABC):
     """Abstract base class for all renderers."""
     
-    def __init__(self, width: int = 80, height: int = 24, color_scheme: str = "default"):
+    def __init__(self, width: int = 80, height: int = 24, color_scheme: str = "default",
+                 use_color: bool = False):
         self.width = width
         self.height = height
         self.color_scheme = color_scheme
         self.colors = COLOR_SCHEMES.get(color_scheme, COLOR_SCHEMES["default"])
+        self.use_color = use_color
+    
+    @property
+    def use_color(self) -> bool:
+        """Whether state symbols are wrapped in ANSI color codes."""
+        return self._use_color
+    
+    @use_color.setter
+    def use_color(self, value: bool) -> None:
+        self._use_color = value
+        # Final per-state symbol strings (colored when enabled), built once so
+        # row rendering is a single dict lookup.
+        if value:
+            self._state_prefix = {
+                state: f"{_ansi_color(self._get_node_color(state))}{symbol}{_ANSI_RESET}"
+                for state, symbol in _STATE_SYMBOLS.items()
+            }
+        else:
+            self._state_prefix = dict(_STATE_SYMBOLS)
+        self._style_changed()
+    
+    def _style_changed(self) -> None:
+        """Hook called when an option affecting rendered output changes."""
     
     @abstractmethod
-    def render(self, data: VisualizationData) -> str:
-        """Render the visualization data to a string."""
+    def render(self, data: VisualizationData, ctx: Optional[RenderContext] = None) -> str:
+        """Render the visualization data to a string.
+
+        ``ctx`` carries per-frame state shared with other renderers; a fresh
+        one is created when omitted.
+        """
         pass
     
     def _get_node_color(self, state: NodeState) -> str:
@@ -33,129 +139,184 @@ class BaseRenderer(ABC):
     def _get_message_color(self, msg_type: MessageType) -> str:
         """Get color for a message type."""
         return MESSAGE_COLORS.get(msg_type, "white")
+    
+    def _get_state_symbol(self, state: NodeState) -> str:
+        """Get symbol representation for node state."""
+        return self._state_prefix.get(state, "?")
 
 
 class TreeRenderer(BaseRenderer):
     """Renders the fractal tree structure."""
     
     def __init__(self, width: int = 80, height: int = 24, 
-                 color_scheme: str = "default", show_ids: bool = False):
-        super().__init__(width, height, color_scheme)
+                 color_scheme: str = "default", show_ids: bool = False,
+                 use_color: bool = False):
+        # node id -> ((subtree version, prefix, is_last), rendered lines)
+        self._subtree_cache: Dict[str, Tuple[Tuple[Tuple[int, int], str, bool], List[str]]] = {}
+        self._cache_data: Optional[VisualizationData] = None
+        self._cache_hierarchy_version = -1
+        super().__init__(width, height, color_scheme, use_color)
         self.show_ids = show_ids
     
-    def render(self, data: VisualizationData) -> str:
+    @property
+    def show_ids(self) -> bool:
+        """Whether node rows are prefixed with the node id."""
+        return self._show_ids
+    
+    @show_ids.setter
+    def show_ids(self, value: bool) -> None:
+        self._show_ids = value
+        self._style_changed()
+    
+    def _style_changed(self) -> None:
+        self._subtree_cache.clear()
+    
+    def render(self, data: VisualizationData, ctx: Optional[RenderContext] = None) -> str:
         """Render the tree structure as ASCII art."""
         if not data.nodes:
             return "No nodes to display"
+        if ctx is None:
+            ctx = RenderContext(data)
         
-        lines = []
-        lines.append("=" * self.width)
-        lines.append("FRACTAL TREE VISUALIZATION")
-        lines.append("=" * self.width)
-        lines.append("")
+        rule = "=" * self.width
+        buf = io.StringIO()
+        buf.write(f"{rule}\nFRACTAL TREE VISUALIZATION\n{rule}\n\n")
         
         # Get root nodes and render each tree
         root_nodes = data.get_root_nodes()
-        hierarchy = data.get_node_hierarchy()
+        hierarchy = ctx.get_node_hierarchy()
+        
+        # Every cached entry is keyed on the hierarchy version, so a
+        # structural change (including removals) invalidates all of them.
+        hierarchy_version = data.get_hierarchy_version()
+        if self._cache_data is not data or self._cache_hierarchy_version != hierarchy_version:
+            self._subtree_cache.clear()
+            self._cache_data = data
+            self._cache_hierarchy_version = hierarchy_version
         
         for root in root_nodes:
             tree_lines = self._render_node_tree(root, hierarchy, data.nodes, "", True)
-            lines.extend(tree_lines)
-            lines.append("")
+            buf.write("\n".join(tree_lines))
+            buf.write("\n\n")
         
         # Add summary statistics
-        lines.append("-" * self.width)
-        lines.append(f"Total Nodes: {len(data.nodes)}")
-        lines.append(f"Active Nodes: {len(data.get_active_nodes())}")
-        lines.append(f"Recent Messages: {len(data.get_recent_messages())}")
-        lines.append(f"Recent Transitions: {len(data.get_recent_transitions())}")
+        buf.write(
+            f"{'-' * self.width}\n"
+            f"Total Nodes: {len(data.nodes)}\n"
+            f"Active Nodes: {len(data.get_active_nodes())}\n"
+            f"Recent Messages: {len(ctx.get_recent_messages())}\n"
+            f"Recent Transitions: {len(ctx.get_recent_transitions())}"
+        )
         
-        return "\n".join(lines)
+        return buf.getvalue()
     
     def _render_node_tree(self, node: TreeNode, hierarchy: Dict[str, List[str]], 
                          all_nodes: Dict[str, TreeNode], prefix: str, is_last: bool) -> List[str]:
-        """Recursively render a node and its children."""
-        lines = []
-        
-        # Node connector
-        connector = "└── " if is_last else "├── "
-        
-        # Node representation
-        state_symbol = self._get_state_symbol(node.state)
-        node_name = f"{node.id}: {node.name}" if self.show_ids else node.name
-        
-        lines.append(f"{prefix}{connector}{state_symbol} {node_name}")
-        
-        # Add metadata if present
-        if node.metadata:
-            meta_info = ", ".join([f"{k}={v}" for k, v in node.metadata.items()])
-            meta_prefix = prefix + ("    " if is_last else "│   ")
-            lines.append(f"{meta_prefix}└─ [{meta_info}]")
+        """Render a node and its children, reusing cached unchanged subtrees.
+
+        Walks the tree with an explicit post-order stack rather than
+        recursion, so deep trees cannot hit the interpreter recursion limit.
+        The returned list may be shared with the cache and must not be
+        mutated.
+        """
+        data = self._cache_data
+        rendered: Dict[str, List[str]] = {}
+        # Frames are (node, prefix, is_last, children); children is None
+        # until the node has been expanded.
+        stack: List[Tuple[TreeNode, str, bool, Optional[List[Tuple[TreeNode, bool]]]]] = [
+            (node, prefix, is_last, None)
+        ]
         
-        # Render children
-        children_ids = hierarchy.get(node.id, [])
-        for i, child_id in enumerate(children_ids):
-            if child_id in all_nodes:
-                child_node = all_nodes[child_id]
-                child_prefix = prefix + ("    " if is_last else "│   ")
-                child_is_last = (i == len(children_ids) - 1)
+        while stack:
+            current, current_prefix, current_is_last, children = stack.pop()
+            version = data.get_subtree_version(current.id) if data is not None else None
+            # Indent shared by the metadata line and every child row
+            child_prefix = current_prefix + ("    " if current_is_last else "│   ")
+            
+            if children is None:
+                cached = self._subtree_cache.get(current.id)
+                if (version is not None and cached is not None
+                        and cached[0] == (version, current_prefix, current_is_last)):
+                    rendered[current.id] = cached[1]
+                    continue
                 
-                child_lines = self._render_node_tree(
-                    child_node, hierarchy, all_nodes, child_prefix, child_is_last
-                )
-                lines.extend(child_lines)
+                children_ids = hierarchy.get(current.id, [])
+                last_index = len(children_ids) - 1
+                children = [
+                    (all_nodes[child_id], i == last_index)
+                    for i, child_id in enumerate(children_ids)
+                    if child_id in all_nodes
+                ]
+                # Revisit this node once its children are rendered; push them
+                # reversed so they pop (and render) in display order.
+                stack.append((current, current_prefix, current_is_last, children))
+                for child, child_is_last in reversed(children):
+                    stack.append((child, child_prefix, child_is_last, None))
+                continue
+            
+            lines = []
+            
+            # Node connector
+            connector = "└── " if current_is_last else "├── "
+            
+            # Node representation
+            state_symbol = self._state_prefix[current.state]
+            node_name = f"{current.id}: {current.name}" if self.show_ids else current.name
+            
+            lines.append(f"{current_prefix}{connector}{state_symbol} {node_name}")
+            
+            # Add metadata if present
+            if current.metadata:
+                meta_info = ", ".join(f"{k}={v}" for k, v in current.metadata.items())
+                lines.append(f"{child_prefix}└─ [{meta_info}]")
+            
+            # Attach already-rendered children
+            for child, _ in children:
+                lines.extend(rendered.pop(child.id))
+            
+            # Skip single-child links so long chains keep one cached copy of
+            # their rows rather than one per ancestor.
+            if version is not None and len(children) != 1:
+                self._subtree_cache[current.id] = ((version, current_prefix, current_is_last), lines)
+            rendered[current.id] = lines
         
-        return lines
-    
-    def _get_state_symbol(self, state: NodeState) -> str:
-        """Get symbol representation for node state."""
-        symbols = {
-            NodeState.ACTIVE: "●",
-            NodeState.INACTIVE: "○", 
-            NodeState.PROCESSING: "◐",
-            NodeState.ERROR: "✗",
-            NodeState.UNKNOWN: "?"
-        }
-        return symbols.get(state, "?")
+        return rendered[node.id]
 
 
 class FlowRenderer(BaseRenderer):
     """Renders message flows between nodes."""
     
     def __init__(self, width: int = 80, height: int = 24, 
-                 color_scheme: str = "default", time_window: float = 60.0):
-        super().__init__(width, height, color_scheme)
+                 color_scheme: str = "default", time_window: float = 60.0,
+                 use_color: bool = False):
+        super().__init__(width, height, color_scheme, use_color)
         self.time_window = time_window
     
-    def render(self, data: VisualizationData) -> str:
+    def render(self, data: VisualizationData, ctx: Optional[RenderContext] = None) -> str:
         """Render message flows as a flow diagram."""
+        if ctx is None:
+            ctx = RenderContext(data)
         lines = []
         lines.append("=" * self.width)
         lines.append("MESSAGE FLOW VISUALIZATION")
         lines.append("=" * self.width)
         lines.append("")
         
-        # Get recent messages
-        recent_messages = data.get_recent_messages(self.time_window)
+        # Get recent messages, already grouped by type
+        now = ctx.now
+        by_type = ctx.get_recent_messages_by_type(self.time_window)
         
-        if not recent_messages:
+        if not by_type:
             lines.append("No recent message flows to display")
             return "\n".join(lines)
         
-        # Group messages by type
-        by_type = {}
-        for msg in recent_messages:
-            if msg.message_type not in by_type:
-                by_type[msg.message_type] = []
-            by_type[msg.message_type].append(msg)
-        
         # Render each message type
         for msg_type, messages in by_type.items():
             lines.append(f"{msg_type.value.upper()} MESSAGES:")
             lines.append("-" * 40)
             
             for msg in sorted(messages, key=lambda m: m.timestamp, reverse=True):
-                age = time.time() - msg.timestamp
+                age = now - msg.timestamp
                 status_symbol = self._get_status_symbol(msg.status)
                 
                 source_name = self._get_node_name(msg.source_id, data.nodes)
@@ -163,15 +324,16 @@ class FlowRenderer(BaseRenderer):
                 
                 lines.append(f"{status_symbol} {source_name} → {target_name} ({age:.1f}s ago)")
                 
-                # Add content preview if available
-                if hasattr(msg.content, '__str__') and len(str(msg.content)) < 50:
-                    lines.append(f"    Content: {msg.content}")
+                # Add content preview if short enough
+                content = str(msg.content)
+                if len(content) < 50:
+                    lines.append(f"    Content: {content}")
             
             lines.append("")
         
         # Add flow statistics
         lines.append("-" * self.width)
-        lines.append(f"Total Flows: {len(recent_messages)}")
+        lines.append(f"Total Flows: {sum(len(messages) for messages in by_type.values())}")
         lines.append(f"Time Window: {self.time_window}s")
         
         # Message type breakdown
@@ -182,12 +344,7 @@ class FlowRenderer(BaseRenderer):
     
     def _get_status_symbol(self, status: str) -> str:
         """Get symbol for message status."""
-        symbols = {
-            "pending": "⏳",
-            "delivered": "✓",
-            "failed": "✗"
-        }
-        return symbols.get(status, "?")
+        return _STATUS_SYMBOLS.get(status, "?")
     
     def _get_node_name(self, node_id: str, nodes: Dict[str, TreeNode]) -> str:
         """Get display name for a node."""
@@ -200,12 +357,15 @@ class StateRenderer(BaseRenderer):
     """Renders state transitions over time."""
     
     def __init__(self, width: int = 80, height: int = 24, 
-                 color_scheme: str = "default", time_window: float = 300.0):
-        super().__init__(width, height, color_scheme)
+                 color_scheme: str = "default", time_window: float = 300.0,
+                 use_color: bool = False):
+        super().__init__(width, height, color_scheme, use_color)
         self.time_window = time_window
     
-    def render(self, data: VisualizationData) -> str:
+    def render(self, data: VisualizationData, ctx: Optional[RenderContext] = None) -> str:
         """Render state transitions as a timeline."""
+        if ctx is None:
+            ctx = RenderContext(data)
         lines = []
         lines.append("=" * self.width)
         lines.append("STATE TRANSITION VISUALIZATION")
@@ -213,7 +373,8 @@ class StateRenderer(BaseRenderer):
         lines.append("")
         
         # Get recent transitions
-        recent_transitions = data.get_recent_transitions(self.time_window)
+        now = ctx.now
+        recent_transitions = ctx.get_recent_transitions(self.time_window)
         
         if not recent_transitions:
             lines.append("No recent state transitions to display")
@@ -225,12 +386,13 @@ class StateRenderer(BaseRenderer):
         lines.append("RECENT TRANSITIONS:")
         lines.append("-" * 60)
         
+        state_prefix = self._state_prefix
         for trans in transitions:
-            age = time.time() - trans.timestamp
+            age = now - trans.timestamp
             node_name = self._get_node_name(trans.node_id, data.nodes)
             
-            from_symbol = self._get_state_symbol(trans.from_state)
-            to_symbol = self._get_state_symbol(trans.to_state)
+            from_symbol = state_prefix[trans.from_state]
+            to_symbol = state_prefix[trans.to_state]
             
             lines.append(f"{age:6.1f}s ago: {node_name}")
             lines.append(f"           {from_symbol} {trans.from_state.value} → {to_symbol} {trans.to_state.value}")
@@ -246,28 +408,16 @@ class StateRenderer(BaseRenderer):
         lines.append(f"Time Window: {self.time_window}s")
         
         # State change breakdown
-        state_changes = {}
-        for trans in transitions:
-            change = f"{trans.from_state.value} → {trans.to_state.value}"
-            state_changes[change] = state_changes.get(change, 0) + 1
+        state_changes = Counter(
+            f"{trans.from_state.value} → {trans.to_state.value}" for trans in transitions
+        )
         
         lines.append("Transition Types:")
-        for change, count in sorted(state_changes.items(), key=lambda x: x[1], reverse=True):
+        for change, count in state_changes.most_common():
             lines.append(f"  {change}: {count}")
         
         return "\n".join(lines)
     
-    def _get_state_symbol(self, state: NodeState) -> str:
-        """Get symbol representation for node state."""
-        symbols = {
-            NodeState.ACTIVE: "●",
-            NodeState.INACTIVE: "○",
-            NodeState.PROCESSING: "◐", 
-            NodeState.ERROR: "✗",
-            NodeState.UNKNOWN: "?"
-        }
-        return symbols.get(state, "?")
-    
     def _get_node_name(self, node_id: str, nodes: Dict[str, TreeNode]) -> str:
         """Get display name for a node."""
         if node_id in nodes:
@@ -279,18 +429,22 @@ class InteractiveRenderer(BaseRenderer):
     """Interactive renderer with real-time updates."""
     
     def __init__(self, width: int = 80, height: int = 24, 
-                 color_scheme: str = "default", refresh_rate: float = 1.0):
-        super().__init__(width, height, color_scheme)
+                 color_scheme: str = "default", refresh_rate: float = 1.0,
+                 use_color: bool = False):
+        super().__init__(width, height, color_scheme, use_color)
         self.refresh_rate = refresh_rate
         self.current_view = "tree"  # tree, flow, state
         self.renderers = {
-            "tree": TreeRenderer(width, height, color_scheme),
-            "flow": FlowRenderer(width, height, color_scheme),
-            "state": StateRenderer(width, height, color_scheme)
+            "tree": TreeRenderer(width, height, color_scheme, use_color=use_color),
+            "flow": FlowRenderer(width, height, color_scheme, use_color=use_color),
+            "state": StateRenderer(width, height, color_scheme, use_color=use_color)
         }
     
-    def render(self, data: VisualizationData) -> str:
+    def render(self, data: VisualizationData, ctx: Optional[RenderContext] = None) -> str:
         """Render the current view with navigation help."""
+        # One snapshot per frame, handed down to whichever view is active
+        if ctx is None:
+            ctx = RenderContext(data)
         lines = []
         
         # Header with navigation
@@ -302,13 +456,13 @@ class InteractiveRenderer(BaseRenderer):
         
         # Render current view
         renderer = self.renderers[self.current_view]
-        view_content = renderer.render(data)
+        view_content = renderer.render(data, ctx)
         lines.append(view_content)
         
         # Footer with timestamp
         lines.append("")
         lines.append("-" * self.width)
-        lines.append(f"Last updated: {time.strftime('%H:%M:%S')}")
+        lines.append(f"Last updated: {time.strftime('%H:%M:%S', time.localtime(ctx.now))}")
         lines.append(f"Refresh rate: {self.refresh_rate}s")
         
         return "\n".join(lines)
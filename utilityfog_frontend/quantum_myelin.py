@@ -1,3 +1,6 @@
+from functools import lru_cache
+
+
 def myelin_layer(agent_a, agent_b, entanglement_strength=1.0):
     """
     Symbolic abstraction of entangled communication between agents.
@@ -8,3 +11,67 @@ def myelin_layer(agent_a, agent_b, entanglement_strength=1.0):
     delta_state = agent_b.state - agent_a.state
     agent_a.state += entanglement_strength * delta_state
     agent_b.state -= entanglement_strength * delta_state
+
+
+def myelin_layer_sequential(states, entanglement_strength=1.0, adjacency=None):
+    """
+    Apply myelin_layer to every entangled pair of a list of states in turn.
+
+    - states: sequence of agent states
+    - entanglement_strength: float (0 to 1), governs influence transfer
+    - adjacency: optional (N, N) boolean matrix (nested lists or an array)
+      of entangled pairs; only the upper triangle is read, and every pair
+      is entangled when omitted
+
+    Pairs (i, j) with i < j are visited in row-major order and each exchange
+    sees the states left by the ones before it, giving exactly the results
+    of a nested loop over myelin_layer. Returns the new states as a list.
+    """
+    kernel = _compiled_sequential_kernel()
+    if kernel is not None:
+        import numpy as np
+
+        values = np.array(states, dtype=np.float64)
+        n = values.size
+        if adjacency is None:
+            mask = np.ones((n, n), dtype=np.bool_)
+        else:
+            mask = np.asarray(adjacency, dtype=np.bool_)
+        kernel(values, mask, float(entanglement_strength))
+        return values.tolist()
+
+    # Interpreted loop: plain floats and lists index much faster than NumPy
+    # scalars, so stay off NumPy entirely.
+    values = [float(state) for state in states]
+    n = len(values)
+    if adjacency is None:
+        adjacency = [[True] * n] * n
+    elif hasattr(adjacency, "tolist"):
+        adjacency = adjacency.tolist()
+    _myelin_sequential_kernel(values, adjacency, entanglement_strength)
+    return values
+
+
+def _myelin_sequential_kernel(states, adjacency, strength):
+    """In-place pair-by-pair exchange used by myelin_layer_sequential."""
+    n = len(states)
+    for i in range(n):
+        for j in range(i + 1, n):
+            if adjacency[i][j]:
+                delta_state = states[j] - states[i]
+                states[i] += strength * delta_state
+                states[j] -= strength * delta_state
+
+
+@lru_cache(maxsize=None)
+def _compiled_sequential_kernel():
+    """Numba build of _myelin_sequential_kernel, or None without Numba.
+
+    Imported on first use so callers of the scalar myelin_layer never pay
+    for NumPy or Numba.
+    """
+    try:
+        from numba import njit
+    except ImportError:
+        return None
+    return njit(cache=True)(_myelin_sequential_kernel)
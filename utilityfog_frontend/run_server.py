@@ -7,14 +7,27 @@ Combined API and WebSocket server for the UtilityFog simulation system.
 
 import uvicorn
 import asyncio
+import os
 import signal
 import sys
+from pathlib import Path
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+# Make the project root importable (testing_framework, agent) wherever the
+# checkout lives, instead of assuming a fixed /app install path
+PROJECT_ROOT = str(Path(__file__).resolve().parent.parent)
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
 # Import our API and WebSocket apps
-from backend.api import app as api_app
-from backend.ws_server import websocket_endpoint
+from backend.api import app as api_app  # noqa: E402
+from backend.ws_server import websocket_endpoint, ConnectionManager, MAX_CLIENT_MESSAGE_CHARS  # noqa: E402
+
+# Messages queued per client before its oldest is dropped
+ConnectionManager.OUTBOX_SIZE = max(
+    1, int(os.environ.get("UTILITYFOG_CLIENT_OUTBOX_SIZE", ConnectionManager.OUTBOX_SIZE))
+)
 
 def create_combined_app():
     """Create combined FastAPI app with both API and WebSocket endpoints."""
@@ -66,7 +79,11 @@ def main():
         host="0.0.0.0",
         port=8003,
         log_level="info",
-        access_log=True
+        access_log=True,
+        # Reject oversized client frames before they are buffered; UTF-8
+        # takes at most 4 bytes per character. The endpoint still checks
+        # MAX_CLIENT_MESSAGE_CHARS on what gets through.
+        ws_max_size=4 * MAX_CLIENT_MESSAGE_CHARS,
     )
 
 if __name__ == "__main__":
@@ -1,3 +1,6 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 from utilityfog_frontend.main_simulation import run_simulation
 
 if __name__ == "__main__":
@@ -5,6 +8,7 @@ if __name__ == "__main__":
         {"param1": 1, "param2": "A"},
         {"param1": 2, "param2": "B"},
     ]
-    for config in test_configs:
-        result = run_simulation(config)
-        print(result)
+    # Configs are independent runs; map() keeps results in config order
+    with ProcessPoolExecutor(max_workers=min(len(test_configs), os.cpu_count() or 1)) as executor:
+        for result in executor.map(run_simulation, test_configs):
+            print(result)
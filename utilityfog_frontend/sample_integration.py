@@ -1,11 +1,17 @@
-from quantum_myelin import myelin_layer
+from quantum_myelin import myelin_layer_sequential
 
 def should_form_entanglement(agent_a, agent_b):
     # Placeholder condition: similarity or some emergent metric
     return True
 
 def evolve_agents(agents):
-    for i in range(len(agents)):
-        for j in range(i+1, len(agents)):
+    n = len(agents)
+    adjacency = [[False] * n for _ in range(n)]
+    for i in range(n):
+        for j in range(i+1, n):
             if should_form_entanglement(agents[i], agents[j]):
-                myelin_layer(agents[i], agents[j], entanglement_strength=0.5)
+                adjacency[i][j] = True
+    states = [agent.state for agent in agents]
+    new_states = myelin_layer_sequential(states, entanglement_strength=0.5, adjacency=adjacency)
+    for agent, state in zip(agents, new_states, strict=True):
+        agent.state = state
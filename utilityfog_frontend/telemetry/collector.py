@@ -5,26 +5,34 @@ Telemetry collector for gathering system metrics and performance data.
 import asyncio
 import time
 import threading
-from typing import Dict, List, Optional, Callable, Any
+from typing import Deque, Dict, List, Mapping, Optional, Callable, Any, Tuple
 from dataclasses import dataclass, field
-from collections import defaultdict
+from collections import deque
+from itertools import islice
 import logging
 
-from .metrics import Metric, Counter, Gauge, Histogram
+from .metrics import FrozenDict, Metric, Counter, Gauge, Histogram
 
 
 logger = logging.getLogger(__name__)
 
+# Shared stand-in for events recorded without labels or metadata
+_EMPTY: Mapping[str, Any] = FrozenDict()
 
-@dataclass
+
+@dataclass(slots=True)
 class TelemetryEvent:
-    """A telemetry event with metadata."""
+    """A telemetry event with metadata.
+
+    Events from ``record_event`` without labels or metadata share one
+    read-only empty ``FrozenDict``; copy before mutating.
+    """
 
     name: str
     value: Any
     timestamp: float = field(default_factory=time.time)
-    labels: Dict[str, str] = field(default_factory=dict)
-    metadata: Dict[str, Any] = field(default_factory=dict)
+    labels: Mapping[str, str] = field(default_factory=dict)
+    metadata: Mapping[str, Any] = field(default_factory=dict)
 
 
 class TelemetryCollector:
@@ -37,25 +45,35 @@ class TelemetryCollector:
     def __init__(self, collection_interval: float = 30.0):
         self.collection_interval = collection_interval
         self._metrics: Dict[str, Metric] = {}
-        self._events: List[TelemetryEvent] = []
-        self._hooks: Dict[str, List[Callable]] = defaultdict(list)
+        # Keep only recent events (last 1000)
+        self._events: Deque[TelemetryEvent] = deque(maxlen=1000)
+        # Copy-on-write: each hook list is an immutable tuple swapped whole
+        # under the lock, so dispatch can read it without locking.
+        self._hooks: Dict[str, Tuple[Callable, ...]] = {}
         self._running = False
         self._lock = threading.RLock()
         self._collection_task: Optional[asyncio.Task] = None
 
-        # Built-in system metrics
+        # Built-in system metrics, kept as direct references for hot paths
+        self._events_counter: Optional[Counter] = None
+        self._collection_runs_counter: Optional[Counter] = None
+        self._metrics_count_gauge: Optional[Gauge] = None
+        self._collection_duration_hist: Optional[Histogram] = None
         self._init_system_metrics()
 
     def _init_system_metrics(self) -> None:
         """Initialize built-in system metrics."""
-        self.register_counter(
+        self._events_counter = self.register_counter(
             "telemetry_events_total", "Total number of telemetry events"
         )
-        self.register_counter(
+        self._collection_runs_counter = self.register_counter(
             "telemetry_collection_runs_total", "Total collection runs"
         )
-        self.register_gauge("telemetry_metrics_count", "Number of registered metrics")
-        self.register_histogram(
+        self._metrics_count_gauge = self.register_gauge(
+            "telemetry_metrics_count", "Number of registered metrics"
+        )
+        self._update_metrics_count()
+        self._collection_duration_hist = self.register_histogram(
             "telemetry_collection_duration_seconds", "Collection duration"
         )
 
@@ -121,47 +139,40 @@ class TelemetryCollector:
     ) -> None:
         """Record a telemetry event."""
         event = TelemetryEvent(
-            name=name, value=value, labels=labels or {}, metadata=metadata or {}
+            name=name, value=value, labels=labels or _EMPTY, metadata=metadata or _EMPTY
         )
 
-        with self._lock:
-            self._events.append(event)
-            # Keep only recent events (last 1000)
-            if len(self._events) > 1000:
-                self._events = self._events[-1000:]
-
-        # Increment events counter
-        if "telemetry_events_total" in self._metrics:
-            metric = self._metrics["telemetry_events_total"]
-            if isinstance(metric, Counter):
-                metric.increment()
-
-        # Trigger event hooks
+        # The bounded deque is the ring buffer: append (and eviction of the
+        # oldest event) is a single atomic C call, so producers never take
+        # the collector lock.
+        self._events.append(event)
+        self._events_counter.increment()
+
         self._trigger_hooks(name, event)
 
     def get_events(self, limit: Optional[int] = None) -> List[TelemetryEvent]:
         """Get recent telemetry events."""
-        with self._lock:
-            events = self._events.copy()
-            if limit:
-                events = events[-limit:]
-            return events
+        # Copying the deque is one C-level pass, atomic w.r.t. producers
+        if limit:
+            return list(islice(self._events, max(0, len(self._events) - limit), None))
+        return list(self._events)
 
     def add_hook(self, hook_type: str, callback: Callable) -> None:
         """Add a hook callback for specific events."""
         with self._lock:
-            self._hooks[hook_type].append(callback)
+            self._hooks[hook_type] = (*self._hooks.get(hook_type, ()), callback)
 
     def remove_hook(self, hook_type: str, callback: Callable) -> None:
         """Remove a hook callback."""
         with self._lock:
-            if callback in self._hooks[hook_type]:
-                self._hooks[hook_type].remove(callback)
+            hooks = list(self._hooks.get(hook_type, ()))
+            if callback in hooks:
+                hooks.remove(callback)
+                self._hooks[hook_type] = tuple(hooks)
 
     def _trigger_hooks(self, hook_type: str, data: Any) -> None:
         """Trigger all hooks of a specific type."""
-        hooks = self._hooks.get(hook_type, [])
-        for hook in hooks:
+        for hook in self._hooks.get(hook_type, ()):
             try:
                 hook(data)
             except Exception as e:
@@ -169,10 +180,8 @@ class TelemetryCollector:
 
     def _update_metrics_count(self) -> None:
         """Update the metrics count gauge."""
-        if "telemetry_metrics_count" in self._metrics:
-            metric = self._metrics["telemetry_metrics_count"]
-            if isinstance(metric, Gauge):
-                metric.set(len(self._metrics))
+        if self._metrics_count_gauge is not None:
+            self._metrics_count_gauge.set(len(self._metrics))
 
     async def start_collection(self) -> None:
         """Start periodic telemetry collection."""
@@ -200,19 +209,13 @@ class TelemetryCollector:
         """Main collection loop."""
         while self._running:
             try:
-                start_time = time.time()
+                start_time = time.perf_counter()
                 await self._collect_metrics()
-                duration = time.time() - start_time
+                duration = time.perf_counter() - start_time
 
                 # Record collection metrics
-                if "telemetry_collection_runs_total" in self._metrics:
-                    metric = self._metrics["telemetry_collection_runs_total"]
-                    if isinstance(metric, Counter):
-                        metric.increment()
-                if "telemetry_collection_duration_seconds" in self._metrics:
-                    metric = self._metrics["telemetry_collection_duration_seconds"]
-                    if isinstance(metric, Histogram):
-                        metric.observe(duration)
+                self._collection_runs_counter.increment()
+                self._collection_duration_hist.observe(duration)
 
                 # Trigger collection hooks
                 self._trigger_hooks(
@@ -247,36 +250,42 @@ class TelemetryCollector:
 
     def get_snapshot(self) -> Dict[str, Any]:
         """Get a snapshot of current telemetry state."""
+        # Only the registry copy needs the collector lock; each metric
+        # guards its own value, so producers aren't stalled by the export.
         with self._lock:
-            metrics_data: Dict[str, Any] = {}
-            for name, metric in self._metrics.items():
-                try:
-                    value = metric.get_value()
-                    if isinstance(value, list):
-                        metrics_data[name] = [
-                            {
-                                "value": v.value,
-                                "labels": v.labels,
-                                "timestamp": v.timestamp,
-                            }
-                            for v in value
-                        ]
-                    else:
-                        metrics_data[name] = {
-                            "value": value.value,
-                            "labels": value.labels,
-                            "timestamp": value.timestamp,
+            items = list(self._metrics.items())
+
+        # One clock read stamps the whole snapshot
+        now = time.time()
+        metrics_data: Dict[str, Any] = {}
+        for name, metric in items:
+            try:
+                value = metric.get_value(now)
+                if isinstance(value, list):
+                    metrics_data[name] = [
+                        {
+                            "value": v.value,
+                            "labels": dict(v.labels),
+                            "timestamp": v.timestamp,
                         }
-                except Exception as e:
-                    logger.error(f"Error getting metric {name}: {e}")
-                    metrics_data[name] = {"error": str(e)}
+                        for v in value
+                    ]
+                else:
+                    metrics_data[name] = {
+                        "value": value.value,
+                        "labels": dict(value.labels),
+                        "timestamp": value.timestamp,
+                    }
+            except Exception as e:
+                logger.error(f"Error getting metric {name}: {e}")
+                metrics_data[name] = {"error": str(e)}
 
-            return {
-                "timestamp": time.time(),
-                "metrics": metrics_data,
-                "events_count": len(self._events),
-                "running": self._running,
-            }
+        return {
+            "timestamp": now,
+            "metrics": metrics_data,
+            "events_count": len(self._events),
+            "running": self._running,
+        }
 
     def reset_all_metrics(self) -> None:
         """Reset all metrics to their initial state."""
@@ -295,7 +304,7 @@ class TelemetryCollector:
 def setup_coordination_hooks(collector: TelemetryCollector) -> None:
     """Set up telemetry hooks for coordination system."""
     # Register coordination metrics
-    collector.register_counter(
+    messages_total = collector.register_counter(
         "coordination_messages_total", "Total coordination messages"
     )
     collector.register_gauge(
@@ -309,8 +318,7 @@ def setup_coordination_hooks(collector: TelemetryCollector) -> None:
         # Hooks REACT to an already-recorded event; re-recording the same
         # event name here re-triggers this hook and recurses until
         # RecursionError (silently swallowed by _trigger_hooks).
-        if "coordination_messages_total" in collector._metrics:
-            collector._metrics["coordination_messages_total"].increment()
+        messages_total.increment()
 
     collector.add_hook("coordination_message", on_coordination_message)
 
@@ -319,50 +327,54 @@ def setup_coordination_hooks(collector: TelemetryCollector) -> None:
 def setup_messaging_hooks(collector: TelemetryCollector) -> None:
     """Set up telemetry hooks for messaging system."""
     # Register messaging metrics
-    collector.register_counter("messages_sent_total", "Total messages sent")
-    collector.register_counter("messages_received_total", "Total messages received")
+    sent_total = collector.register_counter(
+        "messages_sent_total", "Total messages sent"
+    )
+    received_total = collector.register_counter(
+        "messages_received_total", "Total messages received"
+    )
     collector.register_gauge("message_queue_size", "Current message queue size")
     collector.register_histogram(
         "message_processing_duration_seconds", "Message processing duration"
     )
 
     def on_message_sent(message_data):
-        if "messages_sent_total" in collector._metrics:
-            collector._metrics["messages_sent_total"].increment()
+        sent_total.increment()
 
     def on_message_received(message_data):
-        if "messages_received_total" in collector._metrics:
-            collector._metrics["messages_received_total"].increment()
+        received_total.increment()
 
     collector.add_hook("message_sent", on_message_sent)
     collector.add_hook("message_received", on_message_received)
 
 
+# Map health status to numeric value
+_HEALTH_STATUS_VALUES = {"UNKNOWN": 0, "HEALTHY": 1, "DEGRADED": 2, "UNHEALTHY": 3}
+
+
 # Health system hooks
 def setup_health_hooks(collector: TelemetryCollector) -> None:
     """Set up telemetry hooks for health monitoring system."""
     # Register health metrics
-    collector.register_gauge(
+    health_status = collector.register_gauge(
         "health_status",
         "Current health status (0=unknown, 1=healthy, 2=degraded, 3=unhealthy)",
     )
-    collector.register_counter("health_checks_total", "Total health checks performed")
+    checks_total = collector.register_counter(
+        "health_checks_total", "Total health checks performed"
+    )
     collector.register_histogram(
         "health_check_duration_seconds", "Health check duration"
     )
 
     def on_health_check(health_data):
-        if "health_checks_total" in collector._metrics:
-            collector._metrics["health_checks_total"].increment()
+        checks_total.increment()
 
         # Hooks receive the TelemetryEvent; the status dict is its value.
         payload = getattr(health_data, "value", health_data)
         if not isinstance(payload, dict):
             payload = {}
-        # Map health status to numeric value
-        status_map = {"UNKNOWN": 0, "HEALTHY": 1, "DEGRADED": 2, "UNHEALTHY": 3}
-        status_value = status_map.get(payload.get("status", "UNKNOWN"), 0)
-        if "health_status" in collector._metrics:
-            collector._metrics["health_status"].set(status_value)
+        status = payload.get("status", "UNKNOWN")
+        health_status.set(_HEALTH_STATUS_VALUES.get(status, 0))
 
     collector.add_hook("health_check", on_health_check)
@@ -3,21 +3,117 @@ Metrics exporter with Prometheus adapter for telemetry system.
 """
 
 import asyncio
+import io
+import os
+import socket
+import stat
 import time
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any, Tuple, Type
 from dataclasses import dataclass
 import logging
 import json
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 from .collector import TelemetryCollector
-from .metrics import Metric, Counter, Gauge, Histogram, MetricValue
+from .metrics import FrozenDict, Metric, Counter, Gauge, Histogram, MetricValue
 
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on label sets PrometheusAdapter keeps formatted strings for
+_LABELS_CACHE_SIZE = 4096
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    """Write all of ``data`` to ``fd``; pipes and sockets may take it in pieces."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
 
-@dataclass
+
+def _create_temp_file(directory: str, name: str) -> Tuple[int, str]:
+    """Create a uniquely named temp file next to the export target.
+
+    Unlike ``tempfile.mkstemp`` (always 0o600) the file is created 0o666 so
+    the kernel applies the process umask, as for any newly created file.
+    """
+    while True:
+        tmp_path = os.path.join(directory, f".{name}.{os.urandom(6).hex()}.tmp")
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        except FileExistsError:
+            continue
+        return fd, tmp_path
+
+
+def _write_export(path: str, data: bytes) -> None:
+    """Write an export straight through OS file descriptors.
+
+    Regular files go through a uniquely named temp file and ``os.replace`` so
+    readers never see a partial export and concurrent exports cannot clobber
+    each other's temp file; an existing file keeps its mode and a new one
+    gets the umask default. Symlinks are written through rather than
+    replaced. Named pipes and devices (sidecar scrape adapters) are streamed
+    into directly, and Unix sockets are connected to and sent the export,
+    since a rename would replace them.
+    """
+    target = os.path.realpath(path)
+    try:
+        st = os.stat(target)
+    except FileNotFoundError:
+        st = None
+
+    if st is not None and stat.S_ISSOCK(st.st_mode):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(target)
+            sock.sendall(data)
+        return
+
+    if st is not None and not stat.S_ISREG(st.st_mode):
+        fd = os.open(target, os.O_WRONLY)
+        try:
+            _write_all(fd, data)
+        finally:
+            os.close(fd)
+        return
+
+    directory, name = os.path.split(target)
+    fd, tmp_path = _create_temp_file(directory, name)
+    try:
+        try:
+            _write_all(fd, data)
+        finally:
+            os.close(fd)
+        if st is not None:
+            os.chmod(tmp_path, stat.S_IMODE(st.st_mode))
+        os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _dumps_json(obj: Any, pretty: bool) -> bytes:
+    """Serialize to UTF-8 JSON, using orjson's C encoder when installed."""
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_INDENT_2 if pretty else 0
+        return orjson.dumps(obj, default=dict, option=option)
+    return json.dumps(obj, indent=2 if pretty else None).encode("utf-8")
+
+
+# Label-value escapes from the Prometheus text exposition format
+_LABEL_VALUE_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n"})
+
+
+@dataclass(slots=True)
 class ExportedMetric:
     """A metric prepared for export."""
 
@@ -28,6 +124,37 @@ class ExportedMetric:
     timestamp: float
 
 
+def _scalar_values(value) -> List[Dict[str, Any]]:
+    if isinstance(value, MetricValue):
+        return [{"value": value.value, "labels": value.labels}]
+    return []
+
+
+def _histogram_values(value) -> List[Dict[str, Any]]:
+    if isinstance(value, list):
+        return [{"value": v.value, "labels": v.labels} for v in value]
+    return []
+
+
+_ValuesFormatter = Callable[[Any], List[Dict[str, Any]]]
+
+# Metric class -> (exported type name, value formatter)
+_METRIC_FORMATS: Dict[Type[Metric], Tuple[str, _ValuesFormatter]] = {
+    Counter: ("counter", _scalar_values),
+    Gauge: ("gauge", _scalar_values),
+    Histogram: ("histogram", _histogram_values),
+}
+
+
+def _lookup_metric_format(metric_cls: Type[Metric]):
+    """Resolve a metric subclass to its base format and remember the result."""
+    for cls in metric_cls.__mro__:
+        if cls in _METRIC_FORMATS:
+            _METRIC_FORMATS[metric_cls] = _METRIC_FORMATS[cls]
+            return _METRIC_FORMATS[cls]
+    return None
+
+
 class MetricsExporter(ABC):
     """Abstract base class for metrics exporters."""
 
@@ -52,6 +179,10 @@ class PrometheusAdapter(MetricsExporter):
     def __init__(self, output_file: Optional[str] = None):
         self.output_file = output_file
         self._last_export = 0.0
+        # (kind, frozen label set) -> formatted label strings. Keyed by value,
+        # so a recreated metric hits the same entry; cleared when it grows
+        # past _LABELS_CACHE_SIZE so retired label sets are not kept forever.
+        self._labels_cache: Dict[Tuple[str, FrozenDict], Tuple[str, ...]] = {}
 
     async def export_metrics(self, collector: TelemetryCollector) -> bool:
         """Export metrics in Prometheus format."""
@@ -68,8 +199,10 @@ class PrometheusAdapter(MetricsExporter):
             prometheus_text = self._generate_prometheus_text(exported_metrics)
 
             if self.output_file:
-                with open(self.output_file, "w", encoding="utf-8") as f:
-                    f.write(prometheus_text)
+                # Keep file I/O off the event loop
+                await asyncio.to_thread(
+                    _write_export, self.output_file, prometheus_text.encode("utf-8")
+                )
             else:
                 # Log the metrics (in production, this would be served via HTTP)
                 logger.info(f"Exported {len(exported_metrics)} metrics")
@@ -84,32 +217,14 @@ class PrometheusAdapter(MetricsExporter):
     def format_metric(self, name: str, metric: Metric) -> Optional[ExportedMetric]:
         """Format a metric for Prometheus export."""
         try:
-            value = metric.get_value()
-
-            if isinstance(metric, Counter):
-                metric_type = "counter"
-                if isinstance(value, MetricValue):
-                    values = [{"value": value.value, "labels": value.labels}]
-                else:
-                    values = []
-
-            elif isinstance(metric, Gauge):
-                metric_type = "gauge"
-                if isinstance(value, MetricValue):
-                    values = [{"value": value.value, "labels": value.labels}]
-                else:
-                    values = []
-
-            elif isinstance(metric, Histogram):
-                metric_type = "histogram"
-                if isinstance(value, list):
-                    values = [{"value": v.value, "labels": v.labels} for v in value]
-                else:
-                    values = []
-
-            else:
+            metric_format = _METRIC_FORMATS.get(type(metric)) or _lookup_metric_format(
+                type(metric)
+            )
+            if metric_format is None:
                 logger.warning(f"Unknown metric type for {name}")
                 return None
+            metric_type, format_values = metric_format
+            values = format_values(metric.get_value())
 
             return ExportedMetric(
                 name=name,
@@ -126,12 +241,7 @@ class PrometheusAdapter(MetricsExporter):
     @staticmethod
     def _escape_label_value(value):
         """Escape a label value per the Prometheus text exposition format."""
-        return (
-            str(value)
-            .replace("\\", "\\\\")
-            .replace('"', '\\"')
-            .replace("\n", "\\n")
-        )
+        return str(value).translate(_LABEL_VALUE_ESCAPES)
 
     def _format_labels(self, labels):
         if not labels:
@@ -141,66 +251,92 @@ class PrometheusAdapter(MetricsExporter):
         ]
         return "{" + ",".join(pairs) + "}"
 
-    def _histogram_sample_lines(self, metric):
+    def _cached_labels(self, kind, labels, build):
+        """Memoize formatted label strings for a metric's shared labels.
+
+        Metrics hand out one ``FrozenDict`` per label set for their whole
+        lifetime, so the strings built from it never change.
+        """
+        if not isinstance(labels, FrozenDict):
+            return build(labels)
+        key = (kind, labels)
+        strings = self._labels_cache.get(key)
+        if strings is None:
+            if len(self._labels_cache) >= _LABELS_CACHE_SIZE:
+                self._labels_cache.clear()
+            strings = self._labels_cache[key] = build(labels)
+        return strings
+
+    def _labels_str(self, labels):
+        return self._cached_labels(
+            "sample", labels, lambda lbls: (self._format_labels(lbls),)
+        )[0]
+
+    def _histogram_base_labels(self, labels):
+        """Return (base, +Inf bucket) label strings for a histogram sample."""
+
+        def build(labels):
+            base = {k: v for k, v in labels.items() if k not in ("le", "type")}
+            inf = {**base, "le": "+Inf"}
+            return self._format_labels(base), self._format_labels(inf)
+
+        return self._cached_labels("histogram", labels, build)
+
+    def _write_histogram_samples(self, write, metric):
         """Emit spec-compliant histogram samples: _bucket/_sum/_count + +Inf.
 
-        Histogram.observe already keeps cumulative bucket counts, and the
-        +Inf bucket equals the total observation count by definition.
+        Histogram.get_value already reports cumulative bucket counts in
+        ascending ``le`` order, and the +Inf bucket equals the total
+        observation count by definition.
         """
         buckets = []
         sum_value = 0.0
         count_value = 0
-        base_labels = {}
+        base_source = {}
         for value_data in metric.values:
-            labels = dict(value_data["labels"])
+            labels = value_data["labels"]
             if "le" in labels:
-                le = labels.pop("le")
-                buckets.append((float(le), le, value_data["value"], labels))
-                base_labels = labels
+                buckets.append((value_data["value"], labels))
             elif labels.get("type") == "sum":
-                labels.pop("type")
                 sum_value = value_data["value"]
-                base_labels = labels
             elif labels.get("type") == "count":
-                labels.pop("type")
                 count_value = value_data["value"]
-                base_labels = labels
-
-        lines = []
-        for _, le, bucket_count, labels in sorted(buckets, key=lambda b: b[0]):
-            labels_str = self._format_labels({**labels, "le": le})
-            lines.append(f"{metric.name}_bucket{labels_str} {bucket_count}")
-        inf_str = self._format_labels({**base_labels, "le": "+Inf"})
-        lines.append(f"{metric.name}_bucket{inf_str} {count_value}")
-        base_str = self._format_labels(base_labels)
-        lines.append(f"{metric.name}_sum{base_str} {sum_value}")
-        lines.append(f"{metric.name}_count{base_str} {count_value}")
-        return lines
+            else:
+                continue
+            base_source = labels
+
+        name = metric.name
+        for bucket_count, labels in buckets:
+            write(f"{name}_bucket{self._labels_str(labels)} {bucket_count}\n")
+        base_str, inf_str = self._histogram_base_labels(base_source)
+        write(
+            f"{name}_bucket{inf_str} {count_value}\n"
+            f"{name}_sum{base_str} {sum_value}\n"
+            f"{name}_count{base_str} {count_value}\n"
+        )
 
     def _generate_prometheus_text(self, metrics: List[ExportedMetric]) -> str:
         """Generate Prometheus text format from exported metrics."""
-        lines = []
+        buf = io.StringIO()
+        write = buf.write
 
-        for metric in metrics:
-            # Add HELP line
-            if metric.description:
-                lines.append(f"# HELP {metric.name} {metric.description}")
+        for i, metric in enumerate(metrics):
+            if i:
+                write("\n")  # Empty line between metrics
 
-            # Add TYPE line
-            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            name = metric.name
+            if metric.description:
+                write(f"# HELP {name} {metric.description}\n")
+            write(f"# TYPE {name} {metric.metric_type}\n")
 
             if metric.metric_type == "histogram":
-                lines.extend(self._histogram_sample_lines(metric))
+                self._write_histogram_samples(write, metric)
             else:
                 for value_data in metric.values:
-                    labels_str = self._format_labels(value_data["labels"])
-                    lines.append(
-                        f"{metric.name}{labels_str} {value_data['value']}"
-                    )
-
-            lines.append("")  # Empty line between metrics
+                    labels_str = self._labels_str(value_data["labels"])
+                    write(f"{name}{labels_str} {value_data['value']}\n")
 
-        return "\n".join(lines)
+        return buf.getvalue()
 
     def get_last_export_time(self) -> float:
         """Get the timestamp of the last successful export."""
@@ -221,11 +357,8 @@ class JSONExporter(MetricsExporter):
             snapshot = collector.get_snapshot()
 
             if self.output_file:
-                with open(self.output_file, "w", encoding="utf-8") as f:
-                    if self.pretty:
-                        json.dump(snapshot, f, indent=2)
-                    else:
-                        json.dump(snapshot, f)
+                data = _dumps_json(snapshot, self.pretty)
+                await asyncio.to_thread(_write_export, self.output_file, data)
             else:
                 logger.info(
                     f"JSON metrics snapshot: {len(snapshot.get('metrics', {}))} metrics"
@@ -251,19 +384,18 @@ class MultiExporter(MetricsExporter):
         self.exporters = exporters
 
     async def export_metrics(self, collector: TelemetryCollector) -> bool:
-        """Export metrics using all configured exporters."""
-        results = []
+        """Export metrics using all configured exporters concurrently."""
+        results = await asyncio.gather(
+            *(exporter.export_metrics(collector) for exporter in self.exporters),
+            return_exceptions=True,
+        )
 
-        for exporter in self.exporters:
-            try:
-                result = await exporter.export_metrics(collector)
-                results.append(result)
-            except Exception as e:
-                logger.error(f"Error in exporter {type(exporter).__name__}: {e}")
-                results.append(False)
+        for exporter, result in zip(self.exporters, results, strict=True):
+            if isinstance(result, BaseException):
+                logger.error(f"Error in exporter {type(exporter).__name__}: {result}")
 
         # Return True if at least one exporter succeeded
-        return any(results)
+        return any(result is True for result in results)
 
     def format_metric(self, name: str, metric: Metric) -> Optional[ExportedMetric]:
         """Format metric (delegates to first exporter)."""
@@ -4,13 +4,41 @@ Core metrics types and data structures for telemetry system.
 
 import time
 from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Dict, List, Optional, Union
-from collections import defaultdict
+from typing import Dict, List, Mapping, Optional, Union
 import threading
 
 
+class FrozenDict(dict):
+    """A read-only, hashable dict for label sets shared between values.
+
+    Unlike ``MappingProxyType`` it survives ``pickle``, ``copy.deepcopy``
+    and ``dataclasses.asdict``.
+    """
+
+    __slots__ = ("_hash",)
+
+    def __hash__(self):
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash = hash(frozenset(self.items()))
+            return self._hash
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} is read-only")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+
 class MetricType(Enum):
     """Types of metrics supported by the telemetry system."""
 
@@ -19,13 +47,16 @@ class MetricType(Enum):
     HISTOGRAM = "histogram"
 
 
-@dataclass
+@dataclass(slots=True)
 class MetricValue:
-    """A single metric value with timestamp and labels."""
+    """A single metric value with timestamp and labels.
+
+    Labels produced by the built-in metrics are shared ``FrozenDict`` instances.
+    """
 
     value: Union[int, float]
     timestamp: float = field(default_factory=time.time)
-    labels: Dict[str, str] = field(default_factory=dict)
+    labels: Mapping[str, str] = field(default_factory=dict)
 
 
 class Metric(ABC):
@@ -37,11 +68,20 @@ class Metric(ABC):
         self.name = name
         self.description = description
         self.labels = labels or {}
-        self._lock = threading.RLock()
+        # Labels are fixed at construction, so every value shares one view
+        self._labels_ro = FrozenDict(self.labels)
+        self._lock = threading.Lock()
 
     @abstractmethod
-    def get_value(self) -> Union[MetricValue, List[MetricValue]]:
-        """Get the current metric value(s)."""
+    def get_value(
+        self, timestamp: Optional[float] = None
+    ) -> Union[MetricValue, List[MetricValue]]:
+        """Get the current metric value(s).
+
+        ``timestamp`` stamps the returned values; callers reading many
+        metrics at once pass a single time so each value needn't read the
+        clock. Defaults to now.
+        """
         pass
 
     @abstractmethod
@@ -69,10 +109,14 @@ class Counter(Metric):
         with self._lock:
             self._value += amount
 
-    def get_value(self) -> MetricValue:
+    def get_value(self, timestamp: Optional[float] = None) -> MetricValue:
         """Get the current counter value."""
+        if timestamp is None:
+            timestamp = time.time()
         with self._lock:
-            return MetricValue(value=self._value, labels=self.labels.copy())
+            return MetricValue(
+                value=self._value, timestamp=timestamp, labels=self._labels_ro
+            )
 
     def reset(self) -> None:
         """Reset the counter to zero."""
@@ -108,10 +152,14 @@ class Gauge(Metric):
         with self._lock:
             self._value -= amount
 
-    def get_value(self) -> MetricValue:
+    def get_value(self, timestamp: Optional[float] = None) -> MetricValue:
         """Get the current gauge value."""
+        if timestamp is None:
+            timestamp = time.time()
         with self._lock:
-            return MetricValue(value=self._value, labels=self.labels.copy())
+            return MetricValue(
+                value=self._value, timestamp=timestamp, labels=self._labels_ro
+            )
 
     def reset(self) -> None:
         """Reset the gauge to zero."""
@@ -143,7 +191,15 @@ class Histogram(Metric):
             5.0,
             10.0,
         ]
-        self._bucket_counts: Dict[float, int] = defaultdict(int)
+        self._sorted_buckets = tuple(sorted(self.buckets))
+        self._le_labels = [
+            FrozenDict({**self.labels, "le": str(bucket)})
+            for bucket in self._sorted_buckets
+        ]
+        self._sum_labels = FrozenDict({**self.labels, "type": "sum"})
+        self._count_labels = FrozenDict({**self.labels, "type": "count"})
+        # Per-bucket (non-cumulative) counts; get_value accumulates them.
+        self._bucket_counts = array("q", [0] * len(self._sorted_buckets))
         self._sum = 0.0
         self._count = 0
 
@@ -153,31 +209,41 @@ class Histogram(Metric):
             self._sum += value
             self._count += 1
 
-            # Update bucket counts
-            for bucket in self.buckets:
-                if value <= bucket:
-                    self._bucket_counts[bucket] += 1
+            # Count the observation in the smallest bucket that holds it;
+            # values above the largest bucket, and NaN (which compares false
+            # against every bound), only show up in +Inf/count.
+            if value != value:
+                return
+            idx = bisect_left(self._sorted_buckets, value)
+            if idx < len(self._bucket_counts):
+                self._bucket_counts[idx] += 1
 
-    def get_value(self) -> List[MetricValue]:
+    def get_value(self, timestamp: Optional[float] = None) -> List[MetricValue]:
         """Get histogram values including buckets, sum, and count."""
+        if timestamp is None:
+            timestamp = time.time()
         with self._lock:
             values = []
 
-            # Bucket values
-            for bucket in sorted(self.buckets):
+            # Bucket values (cumulative, as Prometheus expects)
+            cumulative = 0
+            bucket_counts = zip(self._le_labels, self._bucket_counts, strict=True)
+            for labels, count in bucket_counts:
+                cumulative += count
                 values.append(
-                    MetricValue(
-                        value=self._bucket_counts[bucket],
-                        labels={**self.labels, "le": str(bucket)},
-                    )
+                    MetricValue(value=cumulative, timestamp=timestamp, labels=labels)
                 )
 
             # Sum and count
             values.append(
-                MetricValue(value=self._sum, labels={**self.labels, "type": "sum"})
+                MetricValue(
+                    value=self._sum, timestamp=timestamp, labels=self._sum_labels
+                )
             )
             values.append(
-                MetricValue(value=self._count, labels={**self.labels, "type": "count"})
+                MetricValue(
+                    value=self._count, timestamp=timestamp, labels=self._count_labels
+                )
             )
 
             return values
@@ -185,6 +251,6 @@ class Histogram(Metric):
     def reset(self) -> None:
         """Reset the histogram to initial state."""
         with self._lock:
-            self._bucket_counts.clear()
+            self._bucket_counts = array("q", [0] * len(self._sorted_buckets))
             self._sum = 0.0
             self._count = 0
@@ -1,32 +1,38 @@
+import json
 import os
-import time
-import yaml
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
-from simulation.main_simulation import SimulationRunner
 
 # Define test parameters
 POPULATIONS = [25, 50, 100]
 MUTATION_RATES = [0.1, 0.3, 0.5]
 REPETITIONS = 3
 MAX_STEPS = 500
+MAX_WORKERS = os.cpu_count() or 1
 
 RESULTS_DIR = "data/results"
 LOGS_DIR = "data/logs"
 REPORT_PATH = os.path.join(RESULTS_DIR, "summary_report.md")
 
+# Dict key types json.dump accepts; other keys are written as str(key)
+JSON_KEY_TYPES = (str, int, float, bool, type(None))
+
 os.makedirs(RESULTS_DIR, exist_ok=True)
 os.makedirs(LOGS_DIR, exist_ok=True)
 
-def run_single_simulation(pop, mut_rate, run_id):
+def run_single_simulation(pop, mut_rate, run_id, batch_ts):
+    # Imported here so only the worker processes load the simulation stack;
+    # the parent just schedules runs and writes the report.
+    from simulation.main_simulation import SimulationRunner
+
     config = {
         "population_size": pop,
         "mutation_rate": mut_rate,
         "max_steps": MAX_STEPS
     }
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    label = f"pop{pop}_mut{int(mut_rate * 100)}_run{run_id}_{timestamp}"
-    result_path = os.path.join(RESULTS_DIR, f"{label}.yaml")
+    label = run_label(pop, mut_rate, run_id, batch_ts)
+    result_path = os.path.join(RESULTS_DIR, f"{label}.json")
     log_path = os.path.join(LOGS_DIR, f"{label}.log")
 
     print(f"▶️ Running: {label}")
@@ -36,36 +42,89 @@ def run_single_simulation(pop, mut_rate, run_id):
         runner.run_simulation(log_output=log_file)
 
     with open(result_path, 'w') as f:
-        yaml.dump(runner.metrics, f)
+        json.dump(to_json_compatible(runner.metrics), f, default=str)
 
-    return label, result_path
+    # Format the report entry here, from the metrics already in memory,
+    # rather than having the parent re-read and parse each result file.
+    return format_summary_entry(label, runner.metrics)
 
-def summarize_results(results):
-    lines = ["# Simulation Summary Report\n"]
+def to_json_compatible(value):
+    """Convert metrics to JSON types; yaml.dump took numpy values, tuple keys."""
+    if isinstance(value, dict):
+        return {
+            (key if isinstance(key, JSON_KEY_TYPES) else str(key)):
+                to_json_compatible(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [to_json_compatible(item) for item in value]
+    if hasattr(value, "tolist"):  # numpy scalars and arrays
+        return to_json_compatible(value.tolist())
+    return value
 
-    for label, path in results:
-        with open(path, 'r') as f:
-            metrics = yaml.safe_load(f)
+def run_label(pop, mut_rate, run_id, batch_ts):
+    return f"pop{pop}_mut{int(mut_rate * 100)}_run{run_id}_{batch_ts}"
 
-        lines.append(f"## {label}")
-        lines.append(f"- Final Step: {metrics.get('step', 'N/A')}")
-        lines.append(f"- Avg Fitness: {metrics.get('avg_fitness', 'N/A')}")
-        lines.append(f"- Diversity: {metrics.get('diversity', 'N/A')}")
-        lines.append(f"- Energy: {metrics.get('energy', 'N/A')}\n")
+def format_failure_entry(label, error):
+    return (
+        f"## {label}\n"
+        f"- FAILED: {type(error).__name__}: {error}\n\n"
+    )
 
-    with open(REPORT_PATH, 'w') as f:
-        f.write("\n".join(lines))
-    print(f"📄 Summary written to: {REPORT_PATH}")
+def format_summary_entry(label, metrics):
+    return (
+        f"## {label}\n"
+        f"- Final Step: {metrics.get('step', 'N/A')}\n"
+        f"- Avg Fitness: {metrics.get('avg_fitness', 'N/A')}\n"
+        f"- Diversity: {metrics.get('diversity', 'N/A')}\n"
+        f"- Energy: {metrics.get('energy', 'N/A')}\n\n"
+    )
 
 def main():
-    results = []
-    for pop in POPULATIONS:
-        for mut in MUTATION_RATES:
-            for rep in range(1, REPETITIONS + 1):
-                label, path = run_single_simulation(pop, mut, rep)
-                results.append((label, path))
-                time.sleep(2)
-    summarize_results(results)
+    # One timestamp for the whole sweep: labels stay unique through the
+    # (pop, mut, rep) triple even when parallel runs start in the same second.
+    batch_ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    jobs = [
+        (pop, mut, rep, batch_ts)
+        for pop in POPULATIONS
+        for mut in MUTATION_RATES
+        for rep in range(1, REPETITIONS + 1)
+    ]
+
+    # Runs are independent and CPU-bound; each worker writes its own result
+    # and log files, so only the formatted report entry comes back.
+    # The report is line-buffered and keeps sweep order: finished entries
+    # wait in `ready` until every earlier run is written, so the report is
+    # the same from one sweep to the next, yet progress survives a crash and
+    # can be followed with tail -f. A failed run gets a failure entry
+    # instead of aborting the sweep.
+    failures = 0
+    ready = {}
+    next_index = 0
+    with open(REPORT_PATH, 'w', buffering=1) as report, \
+            ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        report.write("# Simulation Summary Report\n\n")
+        futures = {
+            executor.submit(run_single_simulation, *job): index
+            for index, job in enumerate(jobs)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                ready[index] = future.result()
+            except Exception as e:
+                failures += 1
+                label = run_label(*jobs[index])
+                print(f"❌ Failed: {label}: {e}")
+                ready[index] = format_failure_entry(label, e)
+            while next_index in ready:
+                report.write(ready.pop(next_index))
+                next_index += 1
+
+    if failures:
+        print(f"⚠️ {failures} of {len(jobs)} runs failed")
+
+    print(f"📄 Summary written to: {REPORT_PATH}")
 
 if __name__ == "__main__":
     main()